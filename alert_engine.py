@@ -0,0 +1,156 @@
+import logging
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Defaults for rules that do not set their own hysteresis (as a fraction of the threshold) or cooldown (seconds)
+ALERT_HYSTERESIS = float(os.getenv("ALERT_HYSTERESIS", 0.01))
+ALERT_COOLDOWN = float(os.getenv("ALERT_COOLDOWN", 60 * 60))
+
+RULE_KINDS = ("above", "below", "percent_move")
+
+
+class AlertRule:
+    """A threshold on one target series, e.g. "price:BTC" or "portfolio:Main:value".
+
+    kind is "above", "below" or "percent_move" (threshold in percent, measured
+    from the value at the last alert). hysteresis is the distance the value must
+    move back past the threshold before the rule can fire again.
+    """
+
+    def __init__(self, rule_id, target, kind, threshold, hysteresis=None, cooldown=None, chat_id=None):
+        if kind not in RULE_KINDS:
+            raise ValueError(f"Unknown alert kind '{kind}'")
+        self.rule_id = rule_id
+        self.target = target
+        self.kind = kind
+        self.threshold = float(threshold)
+        self.hysteresis = abs(self.threshold) * ALERT_HYSTERESIS if hysteresis is None else float(hysteresis)
+        self.cooldown = ALERT_COOLDOWN if cooldown is None else float(cooldown)
+        self.chat_id = chat_id
+
+    def definition(self):
+        return (self.target, self.kind, self.threshold, self.hysteresis, self.cooldown, self.chat_id)
+
+    def describe(self, value):
+        if self.kind == "percent_move":
+            return f"{self.target} moved {self.threshold:g}% to {value:g}"
+        return f"{self.target} is {self.kind} {self.threshold:g} ({value:g})"
+
+
+class RuleState:
+    def __init__(self):
+        self.armed = True
+        self.reference = None  # Baseline value for percent_move rules
+        self.last_fired = None
+
+
+class AlertEngine:
+    """Evaluates alert rules against each new sample and fires only on crossings.
+
+    Rules are indexed by target, so a sample only touches the rules for its own
+    series. Each rule keeps its own state: after firing it is disarmed until the
+    value moves back past the threshold by its hysteresis, and it never fires
+    again within its cooldown. A crossing held back by the cooldown disarms the
+    rule too, so it only fires on a later crossing, not because the value is
+    still past the threshold when the cooldown ends.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rules_by_target = {}
+        self._definitions = {}
+        self._states = {}
+
+    def set_rules(self, rules):
+        """Replace the rule set; rules whose definition did not change keep their state."""
+        definitions = {rule.rule_id: rule.definition() for rule in rules}
+        with self._lock:
+            if definitions == self._definitions:
+                return
+            rules_by_target = {}
+            for rule in rules:
+                rules_by_target.setdefault(rule.target, []).append(rule)
+            self._states = {
+                rule_id: self._states[rule_id] if self._definitions.get(rule_id) == definition else RuleState()
+                for rule_id, definition in definitions.items()
+            }
+            self._rules_by_target = rules_by_target
+            self._definitions = definitions
+
+    def evaluate(self, target, value, now=None):
+        """Feed a new sample; returns the rules that fire on it."""
+        now = time.time() if now is None else now
+        fired = []
+        with self._lock:
+            for rule in self._rules_by_target.get(target, ()):
+                if self._evaluate_rule(rule, self._states[rule.rule_id], value, now):
+                    fired.append(rule)
+        for rule in fired:
+            logging.info(f"Alert {rule.rule_id}: {rule.describe(value)}")
+        return fired
+
+    @staticmethod
+    def _evaluate_rule(rule, state, value, now):
+        if rule.kind == "percent_move":
+            if state.reference is None:
+                state.reference = value
+                return False
+            if state.reference == 0 or abs(value / state.reference - 1) * 100 < rule.threshold:
+                return False
+        elif rule.kind == "above":
+            if value < rule.threshold - rule.hysteresis:
+                state.armed = True
+            if not state.armed or value < rule.threshold:
+                return False
+        else:
+            if value > rule.threshold + rule.hysteresis:
+                state.armed = True
+            if not state.armed or value > rule.threshold:
+                return False
+
+        # Crossed: disarm, then fire unless still cooling down
+        state.armed = False
+        state.reference = value
+        if state.last_fired is not None and now - state.last_fired < rule.cooldown:
+            logging.info(f"Alert {rule.rule_id} held back by its cooldown")
+            return False
+        state.last_fired = now
+        return True
+
+
+def portfolio_rule_id(portfolio_name):
+    return f"portfolio:{portfolio_name}:threshold"
+
+
+def alert_chats(rule, chat_ids):
+    """A rule with its own chat_id alerts only that chat, otherwise the target's followers."""
+    return (rule.chat_id,) if rule.chat_id is not None else tuple(chat_ids)
+
+
+def build_rules(config):
+    """Alert rules from the portfolio thresholds plus any rules listed in alerts.json."""
+    rules = [
+        AlertRule(portfolio_rule_id(portfolio["name"]), f"portfolio:{portfolio['name']}:value",
+                  "above", portfolio["threshold"])
+        for portfolio in config.portfolios() if portfolio.get("threshold") is not None
+    ]
+    for index, rule in enumerate(config.alerts()):
+        try:
+            target = rule["target"]
+            if ":" not in target:
+                target = f"price:{target.upper()}"  # Bare ticker symbols watch the price
+            rules.append(AlertRule(
+                rule.get("id", f"alerts.json:{index}"), target, rule.get("kind", "above"), rule["threshold"],
+                rule.get("hysteresis"), rule.get("cooldown"), rule.get("chat_id"),
+            ))
+        except (KeyError, ValueError) as e:
+            logging.error(f"ERROR: Invalid alert rule {rule}: {e}")
+    return rules
+
+
+# Shared by both monitors so ticker and portfolio rules live in one index
+alert_engine = AlertEngine()
@@ -0,0 +1,63 @@
+"""Compare peak memory and parse time of the full and streaming listings parse.
+
+Both paths build a MarketSnapshot from the same listings payload; "full" decodes
+the whole document first, like response.json().
+
+    python benchmarks/bench_listings_parse.py --coins 3500 --repeat 20
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_cmc_server import generate_listings
+from json_stream import iter_json_array
+from market_snapshot import MarketSnapshot
+
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_full(body):
+    return MarketSnapshot.from_listings(json.loads(body.decode("utf-8"))["data"], taken_at=0)
+
+
+def parse_stream(body):
+    chunks = (body[start:start + CHUNK_SIZE] for start in range(0, len(body), CHUNK_SIZE))
+    return MarketSnapshot.from_listings(iter_json_array(chunks, "data"), taken_at=0)
+
+
+def measure(parse, body, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = parse(body)
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    parse(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, min(durations), sum(durations) / repeat, peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--coins", type=int, default=3500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    body = json.dumps({"status": {"error_code": 0}, "data": generate_listings(args.coins)}).encode()
+
+    print(f"{args.coins} coins ({len(body) / 1024 / 1024:.1f} MiB), {args.repeat} runs")
+    results = {}
+    for name, parse in (("full", parse_full), ("stream", parse_stream)):
+        results[name], best, avg, peak = measure(parse, body, args.repeat)
+        print(f"{name:>8}: best {best * 1000:7.1f} ms | avg {avg * 1000:7.1f} ms | "
+              f"peak {peak / 1024 / 1024:7.2f} MiB")
+
+    if json.dumps(results["full"].to_dict()) != json.dumps(results["stream"].to_dict()):
+        raise SystemExit("stream and full parse disagree")
@@ -0,0 +1,51 @@
+"""Compare the "listings" and "quotes" CoinMarketCap fetch modes against the fake CMC server.
+
+    python benchmarks/bench_market_fetch.py --coins 3500 --tickers 10 --cycles 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import market_manager
+from fake_cmc_server import start_fake_cmc_server
+
+
+def run_mode(server, mode, symbols, cycles):
+    market_manager.CMC_FETCH_MODE = mode
+    market_manager.last_listings["fetched_at"] = None
+    server.reset_stats()
+
+    durations = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        market_data = market_manager.fetch_crypto_market_data(symbols)
+        durations.append(time.perf_counter() - start)
+        if market_data is None:
+            raise SystemExit(f"{mode}: fetch failed")
+
+    total_bytes = sum(server.bytes_sent.values())
+    print(f"{mode:>8}: first {durations[0] * 1000:8.1f} ms | "
+          f"avg {sum(durations) / cycles * 1000:8.1f} ms | "
+          f"{total_bytes / cycles / 1024:9.1f} KiB/cycle | "
+          f"{sum(server.requests.values())} requests")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--coins", type=int, default=3500)
+    parser.add_argument("--tickers", type=int, default=10)
+    parser.add_argument("--cycles", type=int, default=20)
+    args = parser.parse_args()
+
+    server = start_fake_cmc_server(args.coins)
+    market_manager.COINMARKETCAP_API_URL = server.base_url
+    market_manager.CMC_CACHE = {"ttl": 0, "stale_ttl": 0}  # Measure the fetch, not the response cache
+    symbols = [coin["symbol"] for coin in server.listings[:args.tickers]]
+
+    print(f"{args.coins} coins, {len(symbols)} tickers, {args.cycles} cycles")
+    for mode in ("listings", "quotes"):
+        run_mode(server, mode, symbols, args.cycles)
+    server.shutdown()
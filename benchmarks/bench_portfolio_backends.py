@@ -0,0 +1,68 @@
+"""Benchmark the portfolio scraping backends against saved CoinStats pages and check they agree.
+
+    python benchmarks/bench_portfolio_backends.py --rounds 50
+    python benchmarks/bench_portfolio_backends.py --rounds 5 --selenium   # needs Chrome
+"""
+import argparse
+import functools
+import os
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import portfolio_manager
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PORTFOLIO_FIXTURES = ["coinstats_portfolio.html", "coinstats_portfolio_span_username.html"]
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server():
+    """Serve the fixtures directory on a background thread and return the server."""
+    handler = functools.partial(QuietHandler, directory=FIXTURES_DIR)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_backend(name, urls, rounds):
+    backend = portfolio_manager.PORTFOLIO_BACKENDS[name]
+    results = {}
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for url in urls:
+            results[url] = backend(url)
+    elapsed = time.perf_counter() - start
+
+    scrapes = rounds * len(urls)
+    print(f"{name:>8}: {elapsed / scrapes * 1000:8.1f} ms/portfolio | {scrapes / elapsed:8.1f} portfolios/s")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--selenium", action="store_true", help="also run the Selenium backend")
+    args = parser.parse_args()
+
+    server = start_fixture_server()
+    host, port = server.server_address[:2]
+    urls = [f"http://{host}:{port}/{fixture}" for fixture in PORTFOLIO_FIXTURES]
+
+    results = {"http": run_backend("http", urls, args.rounds)}
+    if args.selenium:
+        results["selenium"] = run_backend("selenium", urls, args.rounds)
+        portfolio_manager.browser_pool.close()
+
+    for url in urls:
+        values = {name: backend_results[url] for name, backend_results in results.items()}
+        agree = len(set(values.values())) == 1 and None not in next(iter(values.values()))
+        print(f"{'OK' if agree else 'MISMATCH':>8}: {url.rsplit('/', 1)[1]} {values}")
+    server.shutdown()
@@ -0,0 +1,45 @@
+"""Measure Telegram queue throughput against the fake Telegram server.
+
+Queues a burst of portfolio-style updates for several chats and reports how long
+delivery takes, how many requests it needed and whether any were rate limited.
+
+    python benchmarks/bench_telegram_queue.py --chats 5 --messages 40
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import notifier
+from fake_telegram_server import start_fake_telegram_server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=5)
+    parser.add_argument("--messages", type=int, default=40, help="messages per chat")
+    parser.add_argument("--chat-interval", type=float, default=0.2, help="per-chat limit of the fake server")
+    parser.add_argument("--no-coalesce", action="store_true")
+    args = parser.parse_args()
+
+    server = start_fake_telegram_server(chat_interval=args.chat_interval)
+    notifier.TELEGRAM_API_URL = server.base_url
+    queue = notifier.TelegramQueue(chat_interval=args.chat_interval, coalesce_window=0.1)
+
+    start = time.perf_counter()
+    for index in range(args.messages):
+        for chat in range(args.chats):
+            queue.enqueue(f"📊 <b>Portfolio {index} Update</b>\n💰 Current Value: ${index * 100:.2f}",
+                          chat_id=f"chat-{chat}", coalesce=not args.no_coalesce)
+    enqueue_time = time.perf_counter() - start
+    queue.flush()
+    elapsed = time.perf_counter() - start
+
+    total = args.chats * args.messages
+    print(f"{total} messages for {args.chats} chats: enqueue {enqueue_time * 1000:.1f} ms, "
+          f"delivered in {elapsed:.2f} s ({total / elapsed:.0f} msg/s)")
+    print(f"{len(server.messages)} requests delivered, {server.rate_limited} rate limited, "
+          f"{queue.sent} sent, {queue.failed} dropped")
+    server.shutdown()
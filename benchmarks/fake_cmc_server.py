@@ -0,0 +1,170 @@
+"""Local stand-in for the CoinMarketCap API, used to benchmark the market fetch offline.
+
+Serves a deterministic synthetic listing from the three endpoints market_manager uses:
+/v1/global-metrics/quotes/latest, /v1/cryptocurrency/listings/latest and
+/v2/cryptocurrency/quotes/latest, plus alternative.me's /fng/ from a recorded
+fixture. Run it directly to point a local monitor at it:
+
+    python benchmarks/fake_cmc_server.py --coins 3500 --port 8765
+    COINMARKETCAP_API_URL=http://127.0.0.1:8765 FEAR_AND_GREED_API_URL=http://127.0.0.1:8765 python market_manager.py
+"""
+import argparse
+import json
+import os
+import random
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# A few real symbols first so the usual tickers.json entries resolve
+KNOWN_COINS = [
+    ("Bitcoin", "BTC"), ("Ethereum", "ETH"), ("Tether USDt", "USDT"), ("BNB", "BNB"),
+    ("Solana", "SOL"), ("XRP", "XRP"), ("USDC", "USDC"), ("Cardano", "ADA"),
+    ("Dogecoin", "DOGE"), ("Avalanche", "AVAX"), ("Polkadot", "DOT"), ("Chainlink", "LINK"),
+]
+
+
+def generate_listings(coin_count, seed=42):
+    """Build a synthetic listings payload shaped like CoinMarketCap's."""
+    rng = random.Random(seed)
+    coins = []
+    for rank in range(1, coin_count + 1):
+        if rank <= len(KNOWN_COINS):
+            name, symbol = KNOWN_COINS[rank - 1]
+        else:
+            name = f"Coin {rank}"
+            # Every 50th coin reuses an earlier symbol, like real listings do
+            symbol = coins[rng.randrange(len(coins))]["symbol"] if rank % 50 == 0 else f"C{rank}"
+
+        price = 60000 / rank ** 1.5 * rng.uniform(0.5, 1.5)
+        market_cap = price * rng.uniform(1e6, 1e9)
+        coins.append({
+            "id": rank * 7,
+            "name": name,
+            "symbol": symbol,
+            "slug": name.lower().replace(" ", "-"),
+            "cmc_rank": rank,
+            "num_market_pairs": rng.randint(1, 10000),
+            "circulating_supply": market_cap / price,
+            "total_supply": market_cap / price * 1.2,
+            "max_supply": None,
+            "infinite_supply": False,
+            "last_updated": "2024-01-01T00:00:00.000Z",
+            "date_added": "2020-01-01T00:00:00.000Z",
+            "tags": ["mineable", "pow", "store-of-value"][:rng.randint(0, 3)],
+            "platform": None,
+            "self_reported_circulating_supply": None,
+            "self_reported_market_cap": None,
+            "quote": {
+                "USD": {
+                    "price": price,
+                    "volume_24h": market_cap * rng.uniform(0.001, 0.3),
+                    "volume_change_24h": rng.uniform(-50, 50),
+                    "percent_change_1h": rng.uniform(-3, 3),
+                    "percent_change_24h": rng.uniform(-40, 40) if rank % 97 else None,
+                    "percent_change_7d": rng.uniform(-60, 60),
+                    "market_cap": market_cap,
+                    "market_cap_dominance": market_cap / 2.5e12 * 100,
+                    "fully_diluted_market_cap": market_cap * 1.2,
+                    "last_updated": "2024-01-01T00:00:00.000Z",
+                }
+            },
+        })
+    return coins
+
+
+FEAR_AND_GREED_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "fear_and_greed.json")
+
+
+def _status():
+    return {"timestamp": "2024-01-01T00:00:00.000Z", "error_code": 0, "error_message": None,
+            "elapsed": 10, "credit_count": 1, "notice": None}
+
+
+class FakeCMCServer(ThreadingHTTPServer):
+    """HTTP server holding the synthetic listing and per-path request/byte counters."""
+    daemon_threads = True
+
+    def __init__(self, address, coin_count):
+        super().__init__(address, FakeCMCHandler)
+        self.listings = generate_listings(coin_count)
+        with open(FEAR_AND_GREED_FIXTURE, "rb") as file:
+            self.fear_and_greed_body = file.read()
+        self.listing_bodies = {}  # Serialised once per page, so the server adds little to a benchmark
+        self.requests = Counter()
+        self.bytes_sent = Counter()
+        self.global_metrics = {
+            "btc_dominance": 54.3, "eth_dominance": 17.1,
+            "quote": {"USD": {"total_market_cap": 2.5e12, "total_volume_24h": 9.1e10}},
+        }
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset_stats(self):
+        self.requests.clear()
+        self.bytes_sent.clear()
+
+
+class FakeCMCHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        body = None
+        if url.path == "/v1/global-metrics/quotes/latest":
+            data = self.server.global_metrics
+        elif url.path == "/fng/":
+            body = self.server.fear_and_greed_body
+        elif url.path == "/v1/cryptocurrency/listings/latest":
+            start = int(params.get("start", 1)) - 1
+            limit = int(params.get("limit", 100))
+            body = self.server.listing_bodies.get((start, limit))
+            if body is None:
+                data = self.server.listings[start:start + limit]
+                body = self.server.listing_bodies[(start, limit)] = json.dumps(
+                    {"status": _status(), "data": data}).encode()
+        elif url.path == "/v2/cryptocurrency/quotes/latest":
+            wanted = set(params.get("symbol", "").split(","))
+            data = {symbol: [] for symbol in wanted}
+            for coin in self.server.listings:
+                if coin["symbol"] in wanted:
+                    data[coin["symbol"]].append(coin)
+        else:
+            self.send_error(404)
+            return
+
+        if body is None:
+            body = json.dumps({"status": _status(), "data": data}).encode()
+        self.server.requests[url.path] += 1
+        self.server.bytes_sent[url.path] += len(body)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_cmc_server(coin_count=3500, port=0):
+    """Start the fake server on a background thread and return it."""
+    server = FakeCMCServer(("127.0.0.1", port), coin_count)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--coins", type=int, default=3500)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = FakeCMCServer(("127.0.0.1", args.port), args.coins)
+    print(f"Fake CoinMarketCap API with {args.coins} coins on {server.base_url}")
+    server.serve_forever()
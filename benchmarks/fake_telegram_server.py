@@ -0,0 +1,85 @@
+"""Local stand-in for the Telegram Bot API sendMessage endpoint.
+
+Records every message it receives and, like Telegram, answers 429 with a
+retry_after when a chat is written to faster than chat_interval seconds.
+
+    python benchmarks/fake_telegram_server.py --port 8766
+    TELEGRAM_API_URL=http://127.0.0.1:8766 python portfolio_manager.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeTelegramServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, chat_interval=1.0):
+        super().__init__(address, FakeTelegramHandler)
+        self.chat_interval = chat_interval
+        self.lock = threading.Lock()
+        self.messages = []  # [(chat_id, text, received_at)]
+        self.rate_limited = 0
+        self.last_message_at = {}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset_stats(self):
+        with self.lock:
+            self.messages.clear()
+            self.rate_limited = 0
+            self.last_message_at.clear()
+
+
+class FakeTelegramHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if not self.path.endswith("/sendMessage"):
+            self.send_error(404)
+            return
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        chat_id = str(payload["chat_id"])
+        now = time.monotonic()
+
+        with self.server.lock:
+            wait = self.server.last_message_at.get(chat_id, float("-inf")) + self.server.chat_interval - now
+            if wait > 0:
+                self.server.rate_limited += 1
+                status, body = 429, {"ok": False, "error_code": 429, "description": "Too Many Requests",
+                                     "parameters": {"retry_after": round(wait, 3)}}
+            else:
+                self.server.last_message_at[chat_id] = now
+                self.server.messages.append((chat_id, payload["text"], now))
+                status, body = 200, {"ok": True, "result": {"message_id": len(self.server.messages)}}
+
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_telegram_server(chat_interval=1.0, port=0):
+    """Start the fake server on a background thread and return it."""
+    server = FakeTelegramServer(("127.0.0.1", port), chat_interval)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--chat-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    server = FakeTelegramServer(("127.0.0.1", args.port), args.chat_interval)
+    print(f"Fake Telegram Bot API on {server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,187 @@
+"""Offline benchmark suite for the market and portfolio pipelines.
+
+Replays fixtures through local stand-in servers (fake CoinMarketCap and
+alternative.me, saved CoinStats pages, a Telegram sink) and reports time per
+operation, throughput and peak traced memory for each case. Results can be
+saved as JSON and compared against an earlier run.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --json before.json
+    python benchmarks/run_benchmarks.py --compare before.json
+    python benchmarks/run_benchmarks.py --quick --selenium   # Selenium needs Chrome
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import market_manager
+import notifier
+import portfolio_manager
+from bench_portfolio_backends import PORTFOLIO_FIXTURES, start_fixture_server
+from fake_cmc_server import start_fake_cmc_server
+from fake_telegram_server import start_fake_telegram_server
+
+COIN_COUNTS = [3500, 10000]
+TICKER_COUNTS = [10, 100]
+CHAT_COUNTS = [1, 10]
+PORTFOLIO_COUNTS = [1, 10, 50]
+SELENIUM_PORTFOLIO_COUNTS = [1, 5]
+
+
+def measure(func, repeat):
+    """Median seconds per call over repeat calls, plus the peak traced memory of one more call."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(durations), peak
+
+
+def result(seconds, peak, items, unit):
+    return {"seconds": seconds, "throughput": items / seconds if seconds else None, "unit": unit,
+            "peak_mib": peak / 1024 / 1024}
+
+
+def bench_market_fetch(results, repeat, coin_counts, ticker_counts):
+    for coins in coin_counts:
+        server = start_fake_cmc_server(coins)
+        market_manager.COINMARKETCAP_API_URL = server.base_url
+        market_manager.FEAR_AND_GREED_API_URL = server.base_url
+        market_manager.CMC_LISTINGS_LIMIT = coins
+        for tickers in ticker_counts:
+            symbols = list(dict.fromkeys(coin["symbol"] for coin in server.listings))[:tickers]
+
+            def fetch():
+                if market_manager.fetch_crypto_market_data(symbols) is None:
+                    raise SystemExit("fetch_crypto_market_data failed")
+
+            seconds, peak = measure(fetch, repeat)
+            results[f"market_fetch[coins={coins},tickers={tickers}]"] = result(seconds, peak, coins, "coins/s")
+        server.shutdown()
+
+
+def bench_market_render(results, repeat, ticker_counts, chat_counts):
+    server = start_fake_cmc_server(COIN_COUNTS[0])
+    market_manager.COINMARKETCAP_API_URL = server.base_url
+    market_manager.FEAR_AND_GREED_API_URL = server.base_url
+    market_manager.CMC_LISTINGS_LIMIT = COIN_COUNTS[0]
+    symbols = list(dict.fromkeys(coin["symbol"] for coin in server.listings))[:max(ticker_counts)]
+    market_data = market_manager.fetch_market_update_data(symbols)
+    server.shutdown()
+
+    for tickers in ticker_counts:
+        for chats in chat_counts:
+            # Each chat follows a different window of the tickers, as subscriptions would
+            chat_symbols = [symbols[chat % len(symbols):][:tickers] for chat in range(chats)]
+
+            def render():
+                for chat in chat_symbols:
+                    market_manager.render_crypto_market_update(
+                        market_data, market_data["fear_and_greed_index"], market_data["sentiment"], chat)
+
+            seconds, peak = measure(render, repeat)
+            results[f"market_render[tickers={tickers},chats={chats}]"] = result(seconds, peak, chats, "messages/s")
+    return market_data
+
+
+def bench_market_send(results, repeat, market_data, chat_counts):
+    """Render and deliver one update per chat to the Telegram sink."""
+    sink = start_fake_telegram_server(chat_interval=0)
+    notifier.TELEGRAM_API_URL = sink.base_url
+    symbols = list(market_data["filtered_data"])
+    for chats in chat_counts:
+        notifier.telegram_queue = notifier.TelegramQueue(chat_interval=0, global_rate=1000, coalesce_window=0)
+        subscriptions = {f"chat-{chat}": symbols for chat in range(chats)}
+
+        def send():
+            market_manager.send_crypto_market_update(
+                market_data, market_data["fear_and_greed_index"], market_data["sentiment"], chats=subscriptions)
+            if not notifier.telegram_queue.flush(timeout=60):
+                raise SystemExit("Telegram sink did not receive every message")
+
+        seconds, peak = measure(send, repeat)
+        results[f"market_send[chats={chats}]"] = result(seconds, peak, chats, "messages/s")
+    sink.shutdown()
+
+
+def bench_portfolios(results, repeat, backend, portfolio_counts):
+    server = start_fixture_server()
+    host, port = server.server_address[:2]
+    scrape = portfolio_manager.PORTFOLIO_BACKENDS[backend]
+    for portfolios in portfolio_counts:
+        urls = [f"http://{host}:{port}/{PORTFOLIO_FIXTURES[index % len(PORTFOLIO_FIXTURES)]}?portfolio={index}"
+                for index in range(portfolios)]
+
+        def scrape_all():
+            for url in urls:
+                if scrape(url)[1] is None:
+                    raise SystemExit(f"{backend} backend returned no data for {url}")
+
+        seconds, peak = measure(scrape_all, repeat)
+        results[f"portfolio_{backend}[portfolios={portfolios}]"] = result(seconds, peak, portfolios, "portfolios/s")
+    server.shutdown()
+
+
+def print_results(results, baseline=None):
+    print(f"{'case':<44} {'time':>10} {'throughput':>27} {'peak':>11}")
+    for name, values in results.items():
+        line = (f"{name:<44} {values['seconds'] * 1000:8.2f}ms "
+                f"{values['throughput']:14.1f} {values['unit']:<12} {values['peak_mib']:8.2f}MiB")
+        previous = (baseline or {}).get(name)
+        if previous:
+            time_change = (values["seconds"] / previous["seconds"] - 1) * 100
+            memory_change = (values["peak_mib"] / previous["peak_mib"] - 1) * 100 if previous["peak_mib"] else 0
+            line += f"   time {time_change:+6.1f}%  memory {memory_change:+6.1f}%"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("--quick", action="store_true", help="smallest sizes only")
+    parser.add_argument("--selenium", action="store_true", help="also time get_portfolio_data_selenium")
+    parser.add_argument("--json", metavar="PATH", help="save the results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="show changes against results saved with --json")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    # Measure the pipelines, not the response cache
+    market_manager.CMC_CACHE = {"ttl": 0, "stale_ttl": 0}
+    market_manager.FEAR_AND_GREED_CACHE = {"ttl": 0, "stale_ttl": 0}
+
+    def sizes(values):
+        return values[:1] if args.quick else values
+
+    results = {}
+    bench_market_fetch(results, args.repeat, sizes(COIN_COUNTS), sizes(TICKER_COUNTS))
+    market_data = bench_market_render(results, args.repeat, sizes(TICKER_COUNTS), sizes(CHAT_COUNTS))
+    bench_market_send(results, args.repeat, market_data, sizes(CHAT_COUNTS))
+    bench_portfolios(results, args.repeat, "http", sizes(PORTFOLIO_COUNTS))
+    if args.selenium:
+        bench_portfolios(results, args.repeat, "selenium", sizes(SELENIUM_PORTFOLIO_COUNTS))
+        portfolio_manager.browser_pool.close()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+    print_results(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"python": platform.python_version(), "created_at": time.time(), "results": results},
+                      file, indent=4)
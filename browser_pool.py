@@ -0,0 +1,153 @@
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+import metrics
+
+
+def chrome_options():
+    """Headless Chrome options used for scraping."""
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--no-sandbox')
+    return options
+
+
+class PooledDriver:
+    """A WebDriver instance plus the number of pages it has loaded."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.quit = False
+
+
+class WebDriverPool:
+    """Long-lived pool of headless Chrome instances reused across scrapes.
+
+    The chromedriver binary is resolved once. An instance is recycled after
+    max_pages page loads, or as soon as it stops responding. close() also quits
+    the instances still checked out, after giving their scrapes time to finish.
+    """
+
+    def __init__(self, size=1, max_pages=50, page_load_timeout=None):
+        self.size = size
+        self.max_pages = max_pages
+        self.page_load_timeout = page_load_timeout
+        self._idle = queue.LifoQueue()  # Reuse the most recently used (warmest) instance first
+        self._created = 0
+        self._lock = threading.Lock()
+        self._returned = threading.Condition(self._lock)
+        self._in_use = set()  # Instances checked out by a scrape
+        self._closed = False
+        self._driver_path = None
+
+    def start(self):
+        """Resolve the driver binary up front so the first scrape does not pay for it."""
+        with self._lock:
+            if self._driver_path is None:
+                self._driver_path = ChromeDriverManager().install()
+                logging.info(f"Using chromedriver at {self._driver_path}")
+        return self._driver_path
+
+    def _create(self):
+        with metrics.span("chrome_startup"):
+            driver = webdriver.Chrome(service=Service(self.start()), options=chrome_options())
+        if self.page_load_timeout is not None:
+            driver.set_page_load_timeout(self.page_load_timeout)
+        return PooledDriver(driver)
+
+    @staticmethod
+    def _is_healthy(pooled):
+        try:
+            pooled.driver.window_handles  # Cheap round trip to the browser
+            return True
+        except WebDriverException:
+            return False
+
+    def _discard(self, pooled):
+        with self._lock:
+            if pooled.quit:
+                return  # Already quit by close()
+            pooled.quit = True
+            self._created -= 1
+        metrics.increment("webdriver_recycled")
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logging.warning(f"Failed to quit WebDriver: {e}")
+
+    def _acquire(self):
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if not can_create:
+                    pooled = self._idle.get()  # Wait for another scrape to hand one back
+                else:
+                    try:
+                        return self._create()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+
+            if self._is_healthy(pooled):
+                return pooled
+            logging.warning("Recycling unresponsive WebDriver instance")
+            self._discard(pooled)
+
+    @contextmanager
+    def driver(self):
+        """Borrow a WebDriver for one scrape and hand it back (or recycle it) afterwards."""
+        with metrics.span("webdriver_acquire"):  # Includes Chrome startup when a new instance is needed
+            pooled = self._acquire()
+        with self._lock:
+            self._in_use.add(pooled)
+        crashed = False
+        try:
+            yield pooled.driver
+        except WebDriverException:
+            crashed = not self._is_healthy(pooled)
+            raise
+        finally:
+            pooled.pages += 1
+            if (self._closed or pooled.quit or crashed or pooled.pages >= self.max_pages
+                    or not self._is_healthy(pooled)):
+                self._discard(pooled)
+            else:
+                self._idle.put(pooled)
+            with self._lock:
+                self._in_use.discard(pooled)
+                self._returned.notify_all()
+
+    def close(self, timeout=10):
+        """Quit every instance, waiting up to timeout seconds for checked-out ones to be handed back."""
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._in_use and time.monotonic() < deadline:
+                self._returned.wait(timeout=deadline - time.monotonic())
+            leftover = list(self._in_use)
+        for pooled in leftover:
+            logging.warning("Quitting a WebDriver that is still in use")
+            self._discard(pooled)
@@ -0,0 +1,203 @@
+import logging
+import os
+import statistics
+import threading
+import time
+
+import requests
+from dotenv import load_dotenv
+
+import metrics
+
+load_dotenv()
+
+# A source's breaker opens after BREAKER_FAILURE_THRESHOLD consecutive failures (a 429 opens it
+# straight away) and stays open for BREAKER_BASE_BACKOFF seconds, doubling on every failed trial
+# up to BREAKER_MAX_BACKOFF. A threshold of 0 disables the breakers
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 3))
+BREAKER_BASE_BACKOFF = float(os.getenv("BREAKER_BASE_BACKOFF", 60))
+BREAKER_MAX_BACKOFF = float(os.getenv("BREAKER_MAX_BACKOFF", 3600))
+
+# Adaptive polling: when enabled, a job's interval shrinks towards POLL_MIN_FACTOR times its base
+# interval while the median value moves more than POLL_VOLATILE_PCT % between polls, and grows towards
+# POLL_MAX_FACTOR times it while it moves less than POLL_FLAT_PCT % or the source rate limits us
+ADAPTIVE_POLLING = os.getenv("ADAPTIVE_POLLING", "false").lower() in ("1", "true", "yes")
+POLL_MIN_FACTOR = float(os.getenv("POLL_MIN_FACTOR", 0.25))
+POLL_MAX_FACTOR = float(os.getenv("POLL_MAX_FACTOR", 4))
+POLL_VOLATILE_PCT = float(os.getenv("POLL_VOLATILE_PCT", 2.0))
+POLL_FLAT_PCT = float(os.getenv("POLL_FLAT_PCT", 0.2))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a source whose breaker is open."""
+
+
+def is_rate_limited(error):
+    response = getattr(error, "response", None)
+    return isinstance(error, requests.HTTPError) and response is not None and response.status_code == 429
+
+
+class CircuitBreaker:
+    """Health of one upstream source: closed (calls go through), open (calls are refused) or half-open.
+
+    Once the backoff has passed, the breaker turns half-open and lets a single
+    trial call through; its outcome closes the breaker or opens it again for
+    twice as long.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name, failure_threshold=None, base_backoff=None, max_backoff=None):
+        self.name = name
+        self.failure_threshold = BREAKER_FAILURE_THRESHOLD if failure_threshold is None else failure_threshold
+        self.base_backoff = BREAKER_BASE_BACKOFF if base_backoff is None else base_backoff
+        self.max_backoff = BREAKER_MAX_BACKOFF if max_backoff is None else max_backoff
+        self.state = self.CLOSED
+        self.failures = 0  # Consecutive failures
+        self.trips = 0  # Consecutive times the breaker opened without a success in between
+        self.open_until = None
+        self.rate_limited = False  # A 429 was seen since the last success
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self, now=None):
+        """Whether a call may go out now; in half-open state only one trial call is allowed."""
+        if self.failure_threshold <= 0:
+            return True
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.state == self.OPEN and now >= self.open_until:
+                self.state = self.HALF_OPEN
+                logging.info(f"Circuit {self.name} half-open, sending a trial request")
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            allowed = self.state == self.CLOSED
+        if not allowed:
+            metrics.increment("circuit_rejected", source=self.name)
+        return allowed
+
+    def record_success(self):
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            if self.state != self.CLOSED:
+                logging.info(f"Circuit {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = self.trips = 0
+            self.rate_limited = self._trial_in_flight = False
+
+    def record_failure(self, rate_limited=False, now=None):
+        if self.failure_threshold <= 0:
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            self.failures += 1
+            self.rate_limited = self.rate_limited or rate_limited
+            trial_failed = self.state == self.HALF_OPEN
+            self._trial_in_flight = False
+            if not (trial_failed or rate_limited or self.failures >= self.failure_threshold):
+                return
+            if self.state == self.OPEN:
+                return  # A call that was already in flight when the breaker opened
+            backoff = min(self.base_backoff * 2 ** self.trips, self.max_backoff)
+            self.trips += 1
+            self.state = self.OPEN
+            self.open_until = now + backoff
+        logging.warning(f"Circuit {self.name} open for {backoff:.0f}s after {self.failures} failure(s)")
+        metrics.increment("circuit_opened", source=self.name)
+
+    def call(self, func, *args, **kwargs):
+        """Call func through the breaker; raises CircuitOpenError instead while it is open."""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} is unavailable until {time.strftime('%H:%M:%S', time.localtime(self.open_until))}")
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(rate_limited=is_rate_limited(e))
+            raise
+        self.record_success()
+        return result
+
+    def describe(self):
+        """One-line human readable status."""
+        if self.state == self.OPEN:
+            return f"{self.name}: open until {time.strftime('%H:%M:%S', time.localtime(self.open_until))}, {self.failures} failures"
+        return f"{self.name}: {self.state.replace('_', '-')}, {self.failures} failures"
+
+    def status(self):
+        return {"name": self.name, "state": self.state, "failures": self.failures,
+                "open_until": self.open_until, "rate_limited": self.rate_limited}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(name):
+    """The shared breaker for a source, created on first use."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_status():
+    with _breakers_lock:
+        return [source_breaker.status() for source_breaker in _breakers.values()]
+
+
+def unhealthy_breakers():
+    """Breakers that are open or half-open."""
+    with _breakers_lock:
+        return [source_breaker for source_breaker in _breakers.values() if source_breaker.state != CircuitBreaker.CLOSED]
+
+
+class AdaptivePolling:
+    """Polling interval of one job, tuned after each poll by how much the polled values moved.
+
+    Volatility is the median move of the polled values, so one small cap jumping
+    does not speed up polling for hundreds of quiet tickers. The interval halves
+    while the market is volatile, grows by half while it is flat, doubles when the
+    source rate limits, and drifts back to base_interval in between.
+    """
+
+    def __init__(self, base_interval, min_factor=None, max_factor=None,
+                 volatile_pct=None, flat_pct=None):
+        self.base_interval = base_interval
+        self.min_interval = base_interval * (POLL_MIN_FACTOR if min_factor is None else min_factor)
+        self.max_interval = base_interval * (POLL_MAX_FACTOR if max_factor is None else max_factor)
+        self.volatile_pct = POLL_VOLATILE_PCT if volatile_pct is None else volatile_pct
+        self.flat_pct = POLL_FLAT_PCT if flat_pct is None else flat_pct
+        self.current = base_interval
+        self._last_values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, values, rate_limited=False):
+        """Feed the values of one poll ({key: number}) and return the next interval."""
+        with self._lock:
+            moves = [
+                abs(value - self._last_values[key]) / abs(self._last_values[key]) * 100
+                for key, value in values.items()
+                if value is not None and self._last_values.get(key)
+            ]
+            self._last_values.update({key: value for key, value in values.items() if value is not None})
+
+            move = statistics.median(moves) if moves else None
+            if rate_limited:
+                self.current *= 2
+            elif move is None:
+                pass  # Nothing to compare yet
+            elif move >= self.volatile_pct:
+                self.current /= 2
+            elif move < self.flat_pct:
+                self.current *= 1.5
+            elif self.current > self.base_interval:
+                self.current = max(self.current / 1.5, self.base_interval)
+            else:
+                self.current = min(self.current * 1.5, self.base_interval)
+            self.current = min(max(self.current, self.min_interval), self.max_interval)
+            return self.current
+
+    def interval(self):
+        return self.current
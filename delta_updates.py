@@ -0,0 +1,56 @@
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "full" sends every ticker and portfolio each cycle; "delta" only sends what moved
+# past DELTA_ABS_THRESHOLD (USD) or DELTA_PCT_THRESHOLD (%) since it was last sent,
+# plus a full digest every FULL_DIGEST_INTERVAL seconds. A threshold of 0 is ignored
+UPDATE_MODE = os.getenv("UPDATE_MODE", "full")
+DELTA_ABS_THRESHOLD = float(os.getenv("DELTA_ABS_THRESHOLD", 0))
+DELTA_PCT_THRESHOLD = float(os.getenv("DELTA_PCT_THRESHOLD", 1.0))
+FULL_DIGEST_INTERVAL = float(os.getenv("FULL_DIGEST_INTERVAL", 6 * 60 * 60))
+
+
+def delta_mode():
+    return UPDATE_MODE == "delta"
+
+
+def is_significant(previous, current, abs_threshold=None, pct_threshold=None):
+    """Whether current moved far enough from the last sent value to be sent again."""
+    abs_threshold = DELTA_ABS_THRESHOLD if abs_threshold is None else abs_threshold
+    pct_threshold = DELTA_PCT_THRESHOLD if pct_threshold is None else pct_threshold
+    if previous is None:
+        return True  # Never sent
+
+    change = abs(current - previous)
+    if abs_threshold > 0 and change >= abs_threshold:
+        return True
+    if pct_threshold > 0 and previous and change / abs(previous) * 100 >= pct_threshold:
+        return True
+    return abs_threshold <= 0 and pct_threshold <= 0 and change > 0
+
+
+class DigestClock:
+    """Tracks, per key, when the last full digest went out and whether the next one is due."""
+
+    def __init__(self, interval=None):
+        self.interval = FULL_DIGEST_INTERVAL if interval is None else interval
+        self._lock = threading.Lock()
+        self._sent_at = {}
+
+    def due(self, key, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            sent_at = self._sent_at.get(key)
+        return sent_at is None or now - sent_at >= self.interval
+
+    def mark(self, key, now=None):
+        with self._lock:
+            self._sent_at[key] = time.time() if now is None else now
+
+    def forget(self, key):
+        with self._lock:
+            self._sent_at.pop(key, None)
@@ -0,0 +1,118 @@
+import logging
+import os
+import time
+from urllib.parse import urlparse
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import metrics
+from circuit_breaker import CircuitOpenError
+from response_cache import ResponseCache, cache_key
+
+load_dotenv()
+
+# Shared HTTP client used for every outbound call (CoinMarketCap, alternative.me, Telegram)
+
+# (connect, read) timeouts in seconds, per host
+DEFAULT_TIMEOUT = (5, 15)
+HOST_TIMEOUTS = {
+    "pro-api.coinmarketcap.com": (5, 20),
+    "api.alternative.me": (5, 10),
+    "api.telegram.org": (5, 10),
+}
+
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 3))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", 0.5))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 10))
+
+# Parsed JSON responses shared by every consumer; RESPONSE_CACHE_FILE keeps them across restarts
+response_cache = ResponseCache(path=os.getenv("RESPONSE_CACHE_FILE"))
+
+
+def _build_session(max_retries=HTTP_MAX_RETRIES):
+    """Create a pooled keep-alive session that retries 429/5xx responses with backoff."""
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # Hand the last response back so callers can raise_for_status()
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+
+    new_session = requests.Session()
+    new_session.mount("https://", adapter)
+    new_session.mount("http://", adapter)
+    return new_session
+
+
+session = _build_session()
+no_retry_session = _build_session(max_retries=0)  # For callers that schedule their own retries
+
+
+def _record_latency(host, elapsed, failed):
+    """Per-host latency and failures, exported on the /metrics endpoint."""
+    metrics.observe("http_request", elapsed, host=host)
+    if failed:
+        metrics.increment("http_request_failures", host=host)
+
+
+def request(method, url, retry=True, breaker=None, **kwargs):
+    """Send a request through the shared session, applying the host timeout and recording latency.
+
+    With retry=False, 429/5xx responses are returned straight away instead of being retried.
+    With a CircuitBreaker, connection errors, 429 and 5xx responses count as failures of
+    its source, and CircuitOpenError is raised without sending while it is open.
+    """
+    host = urlparse(url).hostname
+    kwargs.setdefault("timeout", HOST_TIMEOUTS.get(host, DEFAULT_TIMEOUT))
+    if breaker is not None and not breaker.allow():
+        raise CircuitOpenError(f"Circuit {breaker.name} is open, not calling {host}")
+
+    start = time.perf_counter()
+    failed = True
+    response = None
+    try:
+        response = (session if retry else no_retry_session).request(method, url, **kwargs)
+        failed = not response.ok
+        retries = getattr(response.raw, "retries", None)  # urllib3's retry history for this call
+        if retries is not None and retries.history:
+            metrics.increment("http_retries", len(retries.history), host=host)
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        _record_latency(host, elapsed, failed)
+        logging.debug(f"{method} {host} took {elapsed * 1000:.0f} ms")
+        if breaker is not None:
+            if response is None or response.status_code == 429 or response.status_code >= 500:
+                breaker.record_failure(rate_limited=response is not None and response.status_code == 429)
+            else:
+                breaker.record_success()
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def get_json(url, params=None, headers=None, ttl=0, stale_ttl=0, breaker=None):
+    """GET a JSON endpoint, serving it from the response cache when ttl is set.
+
+    Keyed by URL and params only, so headers such as API keys never end up in the key.
+    """
+    def fetch():
+        response = get(url, params=params, headers=headers, breaker=breaker)
+        response.raise_for_status()
+        with metrics.span("json_parse", host=urlparse(url).hostname):
+            return response.json()
+
+    if ttl <= 0:
+        return fetch()
+    return response_cache.get_or_fetch(cache_key(url, params), fetch, ttl, stale_ttl)
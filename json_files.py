@@ -0,0 +1,33 @@
+import json
+import logging
+import os
+import tempfile
+
+# JSON file helpers shared by the state store and the response cache
+
+
+def read_json_file(path, default):
+    """Read a JSON file, falling back to default when it is missing or corrupt."""
+    if not os.path.exists(path):
+        return default
+    with open(path, "r") as file:
+        try:
+            return json.load(file)
+        except json.JSONDecodeError as e:
+            logging.error(f"ERROR: Could not parse {path}: {e}")
+            return default
+
+
+def write_json_atomic(path, data):
+    """Write JSON to a temp file next to path, then rename it over path."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as file:
+            json.dump(data, file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
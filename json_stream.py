@@ -0,0 +1,102 @@
+import codecs
+import json
+import re
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r"\s*")
+_DELIMITERS = {",", "]", " ", "\t", "\n", "\r"}
+_NEXT_OBJECT = re.compile(r"\s*,\s*\{")
+
+
+def iter_json_array(chunks, key):
+    """Yield the elements of the top-level array under key, decoding one element at a time.
+
+    chunks is an iterable of bytes (e.g. response.iter_content()). Only the
+    unparsed tail of the document and the elements decoded from it are held in memory,
+    so a large listing never exists as one list of dicts. Assumes key appears
+    before any nested object that uses the same key name.
+
+    Once the separator between two objects is known (e.g. "}, {"), the complete
+    objects in the buffer are decoded with one scan up to its last occurrence:
+    the decoder then shares the key strings between them, which makes it as fast
+    as json.loads. If that cut lands inside an object the scan fails and the
+    buffer is decoded one element at a time instead.
+    """
+    text = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    buffer = ""
+    exhausted = False
+    boundary = None  # How one object element runs into the next, e.g. "}, {"
+    batch_failed = False
+
+    def read_more():
+        nonlocal exhausted, batch_failed
+        batch_failed = False
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            return text.decode(b"", final=True)
+        return text.decode(chunk)
+
+    # Skip ahead to the opening bracket of the array
+    while True:
+        match = start.search(buffer)
+        if match:
+            pos = match.end()
+            break
+        if exhausted:
+            raise ValueError(f"No '{key}' array in the JSON document")
+        # Keep a tail in case the key is split across chunks
+        buffer = buffer[-(len(key) + 64):] + read_more()
+
+    scan_once = _decoder.scan_once
+    while True:
+        # Batch path: every element up to the last boundary in the buffer is complete
+        if boundary and not batch_failed:
+            cut = buffer.rfind(boundary, pos)
+            if cut > pos:
+                try:
+                    elements, _ = scan_once("[" + buffer[pos:cut + 1] + "]", 0)
+                except (StopIteration, json.JSONDecodeError):
+                    batch_failed = True  # The boundary matched inside an element
+                else:
+                    yield from elements
+                    pos = cut + len(boundary) - 1
+                    continue
+
+        # Fast path: an element starts right here. It only counts once a delimiter
+        # follows, since an element at the end of the buffer may be cut short (e.g. "12" of "12.5")
+        try:
+            element, end = scan_once(buffer, pos)
+        except (StopIteration, json.JSONDecodeError):
+            end = None
+        if end is not None and (buffer[end:end + 1] in _DELIMITERS or exhausted):
+            yield element
+            if boundary is None and isinstance(element, dict):
+                next_object = _NEXT_OBJECT.match(buffer, end)
+                if next_object:
+                    boundary = "}" + next_object.group()
+            pos = end + 1 if buffer.startswith(",", end) else end
+            continue
+
+        if end is None:
+            # Not at an element: skip whitespace and the separating comma, or stop at the closing bracket
+            skipped = _WHITESPACE.match(buffer, pos).end()
+            if skipped < len(buffer):
+                if buffer[skipped] == "]":
+                    return
+                if buffer[skipped] == ",":
+                    skipped += 1
+                if skipped > pos:
+                    pos = skipped
+                    continue
+            pos = skipped
+        if exhausted:
+            if pos < len(buffer):
+                _decoder.raw_decode(buffer, pos)  # Raises the decode error
+            raise ValueError(f"Unterminated '{key}' array in the JSON document")
+
+        # The next element is incomplete: drop what was consumed and read on
+        buffer = buffer[pos:] + read_more()
+        pos = 0
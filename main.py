@@ -1,9 +1,13 @@
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes, MessageHandler, filters
+import atexit
 import os
-import json
 from dotenv import load_dotenv
 
+from circuit_breaker import unhealthy_breakers
+from message_renderer import MARKET_TEMPLATES
+from state_store import StateStore
+
 # Load environment variables
 load_dotenv()
 
@@ -18,23 +22,26 @@ THRESHOLD = "threshold"
 TICKER_NAME = "ticker_name"
 
 
-# Load JSON data from files
-def load_json_data():
-    with open("portfolios.json", "r") as f:
-        portfolios = json.load(f)
-    with open("tickers.json", "r") as f:
-        tickers = json.load(f)
-    return portfolios, tickers
+# Portfolios and tickers, loaded once and saved in the background when they change
+store = StateStore(save_delay=float(os.getenv("STATE_SAVE_DELAY", 1.0)))
+atexit.register(store.close)
+
 
-def save_json_data(portfolios, tickers):
-    with open("portfolios.json", "w") as f:
-        json.dump(portfolios, f, indent=4)
-    with open("tickers.json", "w") as f:
-        json.dump(tickers, f, indent=4)
+# Subscribed chats have their own tickers and portfolios; other chats edit the shared lists
+def chat_tickers(chat_id):
+    if store.is_subscribed(chat_id):
+        return store.subscriptions()[chat_id]["tickers"]
+    return store.tickers()
 
+def add_chat_ticker(chat_id, ticker):
+    if store.is_subscribed(chat_id):
+        return store.add_chat_ticker(chat_id, ticker)
+    return store.add_ticker(ticker)
 
-# Load data into variables
-portfolios, tickers = load_json_data()
+def remove_chat_ticker(chat_id, ticker):
+    if store.is_subscribed(chat_id):
+        return store.remove_chat_ticker(chat_id, ticker)
+    return store.remove_ticker(ticker)
 
 
 # Start command
@@ -43,6 +50,70 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     await update.message.reply_text("Welcome! Use /commands to access the menu.")
 
 
+# Trigger an immediate update (only available when running through runtime.py)
+async def refresh(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Run the market and/or portfolio update now: /refresh [market|portfolios]."""
+    scheduler = context.application.bot_data.get("scheduler")
+    if scheduler is None:
+        await update.message.reply_text("Refresh is only available when the monitors run with the bot.")
+        return
+
+    job_name = context.args[0].lower() if context.args else None
+    triggered = scheduler.trigger(job_name)
+    if triggered:
+        await update.message.reply_text(f"Refreshing: {', '.join(triggered)}")
+    else:
+        await update.message.reply_text(f"Unknown update '{job_name}'. Use: {', '.join(scheduler.jobs)}")
+
+
+# Show when each monitor runs next
+async def schedule(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Show next run time and last duration of each scheduled update, and any failing source."""
+    scheduler = context.application.bot_data.get("scheduler")
+    if scheduler is None:
+        await update.message.reply_text("No scheduled updates are running with the bot.")
+        return
+    lines = [job.describe() for job in scheduler.jobs.values()]
+    lines += [f"⚠️ {source_breaker.describe()}" for source_breaker in unhealthy_breakers()]
+    await update.message.reply_text("\n".join(lines))
+
+
+# Subscribe this chat to its own market and portfolio updates
+async def subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Give this chat its own ticker and portfolio lists."""
+    if store.subscribe(str(update.effective_chat.id)):
+        await update.message.reply_text(
+            "Subscribed! Tickers and portfolios you add here are sent to this chat. Use /commands to add some."
+        )
+    else:
+        await update.message.reply_text("This chat is already subscribed.")
+
+
+async def unsubscribe(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Stop sending updates to this chat."""
+    if store.unsubscribe(str(update.effective_chat.id)):
+        await update.message.reply_text("Unsubscribed. This chat will no longer receive updates.")
+    else:
+        await update.message.reply_text("This chat is not subscribed.")
+
+
+# Pick how this chat's market updates look
+async def template(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Set the market update template of a subscribed chat: /template [name]."""
+    names = ", ".join(MARKET_TEMPLATES)
+    if not context.args:
+        await update.message.reply_text(f"Usage: /template <name>. Available templates: {names}")
+        return
+
+    name = context.args[0].lower()
+    if name not in MARKET_TEMPLATES:
+        await update.message.reply_text(f"Unknown template '{name}'. Available templates: {names}")
+    elif store.set_chat_template(str(update.effective_chat.id), name):
+        await update.message.reply_text(f"Market updates in this chat now use the '{name}' template.")
+    else:
+        await update.message.reply_text("Use /subscribe first to give this chat its own settings.")
+
+
 # Commands menu
 async def commands(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show the main commands menu."""
@@ -80,7 +151,8 @@ async def handle_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     elif query.data == REMOVE_TICKER:
         # Show a list of tickers to remove
         keyboard = [
-            [InlineKeyboardButton(ticker, callback_data=f"remove_{ticker}")] for ticker in tickers
+            [InlineKeyboardButton(ticker, callback_data=f"remove_{ticker}")]
+            for ticker in chat_tickers(str(update.effective_chat.id))
         ]
         keyboard.append([InlineKeyboardButton("Back", callback_data=BACK)])
         reply_markup = InlineKeyboardMarkup(keyboard)
@@ -89,9 +161,7 @@ async def handle_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     elif query.data.startswith("remove_"):
         # Remove the selected ticker
         ticker_to_remove = query.data.split("_")[1]
-        if ticker_to_remove in tickers:
-            tickers.remove(ticker_to_remove)
-            save_json_data(portfolios, tickers)
+        if remove_chat_ticker(str(update.effective_chat.id), ticker_to_remove):
             await query.edit_message_text(f"Ticker '{ticker_to_remove}' removed successfully!")
         else:
             await query.edit_message_text(f"Ticker '{ticker_to_remove}' not found.")
@@ -125,10 +195,6 @@ async def handle_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
 # Handle user input for adding a portfolio or ticker
 async def handle_user_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle user input for creating portfolios or tickers."""
-    # Reload portfolios and tickers from JSON to ensure the latest state
-    global portfolios, tickers
-    portfolios, tickers = load_json_data()
-
     current_field = context.user_data.get("current_field")
 
     if current_field == NAME:
@@ -180,9 +246,18 @@ async def handle_user_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
                     "threshold": context.user_data.get("portfolio_threshold"),
                     "totalLostOrGainedSinceTheStartOfTheScript": 0,
                 }
-                portfolios.append(new_portfolio)  # Add the new portfolio to the list
-                save_json_data(portfolios, tickers)  # Save changes to JSON file
-                await update.message.reply_text(f"Portfolio '{new_portfolio['name']}' added successfully!")
+                # A subscribed chat's portfolios are its own: kept out of the CHAT_ID chat
+                # and removed again when the chat unsubscribes
+                chat_id = str(update.effective_chat.id)
+                subscribed = store.is_subscribed(chat_id)
+                if subscribed:
+                    new_portfolio["owner"] = chat_id
+                if not store.add_portfolio(new_portfolio):  # Saved to JSON in the background
+                    await update.message.reply_text(f"Portfolio '{new_portfolio['name']}' already exists. Please choose another name.")
+                else:
+                    if subscribed:
+                        store.add_chat_portfolio(chat_id, new_portfolio["name"])
+                    await update.message.reply_text(f"Portfolio '{new_portfolio['name']}' added successfully!")
 
         except ValueError:
             # Handle invalid threshold input
@@ -202,32 +277,39 @@ async def handle_user_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
         # Process ticker name input
         ticker_name = update.message.text.upper()
 
-        if ticker_name not in tickers:
-            tickers.append(ticker_name)  # Add ticker to the list
-            save_json_data(portfolios, tickers)  # Save changes to JSON file
+        if add_chat_ticker(str(update.effective_chat.id), ticker_name):  # Saved to JSON in the background
             await update.message.reply_text(f"Ticker '{ticker_name}' added successfully!")
         else:
             await update.message.reply_text(f"Ticker '{ticker_name}' already exists.")
 
-# Main function
-def main() -> None:
-    """Run the bot."""
-    application = Application.builder().token(os.getenv("TELEGRAM_BOT_TOKEN")).build()
+def build_application(post_init=None) -> Application:
+    """Create the bot application with all handlers registered."""
+    builder = Application.builder().token(os.getenv("TELEGRAM_BOT_TOKEN"))
+    if post_init is not None:
+        builder = builder.post_init(post_init)
+    application = builder.build()
 
     # Handlers
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("commands", commands))
+    application.add_handler(CommandHandler("subscribe", subscribe))
+    application.add_handler(CommandHandler("unsubscribe", unsubscribe))
+    application.add_handler(CommandHandler("template", template))
+    application.add_handler(CommandHandler("refresh", refresh))
+    application.add_handler(CommandHandler("schedule", schedule))
     application.add_handler(CallbackQueryHandler(handle_menu))
 
     # Handle user input for adding a ticker or portfolio fields (name/URL/threshold)
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_user_input))
+    return application
+
+# Main function
+def main() -> None:
+    """Run the bot."""
+    application = build_application()
 
     # Start polling for updates
     application.run_polling()
 
 if __name__ == "__main__":
     main()
-
-
-
-
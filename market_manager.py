@@ -1,29 +1,76 @@
 import time
-import requests
 import logging
-import json
 import os
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 
+import http_client
+import metrics
+from circuit_breaker import ADAPTIVE_POLLING, AdaptivePolling, CircuitOpenError, breaker
+from json_stream import iter_json_array
+from market_snapshot import MarketSnapshot, parse_bands
+from message_renderer import market_renderer
+from alert_engine import alert_chats, alert_engine, build_rules
+from delta_updates import DigestClock, delta_mode, is_significant
+from state_store import ConfigWatcher
+from subscriptions import all_tickers, chat_subscriptions
+from timeseries_store import default_store
+from notifier import send_telegram_message
+from scheduler import run_forever
+
 load_dotenv()
 
-# Telegram Bot Configuration
-TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')  # Replace with your bot token
-CHAT_ID = os.getenv('CHAT_ID')  # Replace with your chat ID
 COINMARKETCAP_API_KEY = os.getenv('COINMARKETCAP_API_KEY')
+COINMARKETCAP_API_URL = os.getenv('COINMARKETCAP_API_URL', 'https://pro-api.coinmarketcap.com')
+FEAR_AND_GREED_API_URL = os.getenv('FEAR_AND_GREED_API_URL', 'https://api.alternative.me')
+
+# Seconds between market updates, aligned to the wall clock (:00 and :30)
+MARKET_UPDATE_INTERVAL = 1800
+
+# CoinMarketCap fetch mode: "listings" pulls the full listing every cycle, "quotes" only
+# requests the watched symbols and refreshes the listing (for top gainer/loser) less often
+CMC_FETCH_MODE = os.getenv('CMC_FETCH_MODE', 'listings')
+CMC_QUOTES_BATCH_SIZE = int(os.getenv('CMC_QUOTES_BATCH_SIZE', 100))
+CMC_LISTINGS_INTERVAL = int(os.getenv('CMC_LISTINGS_INTERVAL', 3 * 60 * 60))  # Seconds between full listing pulls
+CMC_LISTINGS_LIMIT = 3500
+# Parse the listing one coin at a time instead of loading the whole payload ("stream" or "full")
+CMC_LISTINGS_PARSE = os.getenv('CMC_LISTINGS_PARSE', 'stream')
+
+# Movers section: top MOVERS_COUNT gainers/losers per market-cap band ("name:min:max", empty bounds are open),
+# leaving out coins with less than MOVERS_MIN_VOLUME USD of 24h volume. MOVERS_COUNT=0 hides the section
+MOVERS_COUNT = int(os.getenv('MOVERS_COUNT', 3))
+MOVERS_MIN_VOLUME = float(os.getenv('MOVERS_MIN_VOLUME', 1e6))
+MOVERS_BANDS = parse_bands(os.getenv('MOVERS_BANDS', 'Large caps:10e9:,Mid caps:1e9:10e9,Small caps:50e6:1e9'))
+
+# Response cache lifetimes per source, in seconds. Stale entries are still served
+# for stale_ttl seconds while they are refreshed in the background
+CMC_CACHE = {
+    "ttl": int(os.getenv('CMC_CACHE_TTL', 60)),
+    "stale_ttl": int(os.getenv('CMC_CACHE_STALE_TTL', 0)),
+}
+FEAR_AND_GREED_CACHE = {
+    "ttl": int(os.getenv('FEAR_AND_GREED_CACHE_TTL', 60 * 60)),  # The index is published once a day
+    "stale_ttl": int(os.getenv('FEAR_AND_GREED_CACHE_STALE_TTL', 6 * 60 * 60)),
+}
+
+# Upstream calls of one market update run concurrently and must finish within this many seconds
+MARKET_FETCH_DEADLINE = float(os.getenv('MARKET_FETCH_DEADLINE', 30))
+fetch_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix="MarketFetch")
+
+# Upstream health; an open breaker skips the source until its backoff has passed
+cmc_breaker = breaker("coinmarketcap")
+fear_and_greed_breaker = breaker("alternative.me")
+# Update interval tuned by price volatility, used by the scheduler when ADAPTIVE_POLLING is on
+market_polling = AdaptivePolling(MARKET_UPDATE_INTERVAL)
 
 previous_dominance = {"btc_dominance": None}
 previous_prices = {}
+digest_clock = DigestClock()  # When the last full market update went out
+last_listings = {"fetched_at": None, "snapshot": None}  # Full listing in "quotes" mode
 
-def load_tickers():
-    if os.path.exists("tickers.json"):
-        with open("tickers.json", "r") as file:
-            try:
-                return json.load(file)
-            except json.JSONDecodeError:
-                return []
-    return []
+# Watches the config files; each is only parsed again after it changes
+config = ConfigWatcher()
 
 # Configure logging
 logging.basicConfig(
@@ -32,79 +79,108 @@ logging.basicConfig(
     datefmt='%H:%M:%S'
 )
 
-def send_telegram_message(message):
-    """Send a message via Telegram bot."""
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {
-        'chat_id': CHAT_ID,
-        'text': message,
-        'parse_mode': 'HTML',
-        "disable_web_page_preview": True
+def _listing_priority(coin):
+    """Sort key used to pick one coin when several listings share a symbol."""
+    rank = coin.get("cmc_rank")
+    return (rank if rank is not None else float("inf"), coin.get("id", float("inf")))
+
+def read_listings(headers):
+    """Fetch the full CoinMarketCap listing into a MarketSnapshot.
+
+    In "stream" mode the coins are decoded one at a time straight into the
+    snapshot's arrays, so the full list of coin dicts never exists.
+    """
+    coins_url = f"{COINMARKETCAP_API_URL}/v1/cryptocurrency/listings/latest"
+    params = {"start": 1, "limit": CMC_LISTINGS_LIMIT, "convert": "USD"}
+
+    with metrics.span("listings_read", parse=CMC_LISTINGS_PARSE):
+        if CMC_LISTINGS_PARSE != "stream":
+            return MarketSnapshot.from_listings(http_client.get_json(coins_url, params=params, headers=headers, breaker=cmc_breaker)["data"])
+        # Covers the download as well, since the body is parsed while it arrives
+        with http_client.get(coins_url, params=params, headers=headers, stream=True, breaker=cmc_breaker) as response:
+            response.raise_for_status()
+            return MarketSnapshot.from_listings(iter_json_array(response.iter_content(chunk_size=64 * 1024), "data"))
+
+def fetch_listings(headers):
+    """Return the full CoinMarketCap listing as a MarketSnapshot, through the response cache."""
+    if CMC_CACHE["ttl"] <= 0:
+        return read_listings(headers)
+    key = http_client.cache_key(f"{COINMARKETCAP_API_URL}/v1/cryptocurrency/listings/latest", {"snapshot": CMC_LISTINGS_LIMIT})
+    # The snapshot itself is cached, and only turned into a dict when the cache is written to disk
+    return http_client.response_cache.get_or_fetch(
+        key, lambda: read_listings(headers), codec=(MarketSnapshot.to_dict, MarketSnapshot.from_dict), **CMC_CACHE,
+    )
+
+def fetch_quotes_by_symbol(symbols, headers):
+    """Fetch quotes for the given symbols only, in batches of CMC_QUOTES_BATCH_SIZE."""
+    quotes_url = f"{COINMARKETCAP_API_URL}/v2/cryptocurrency/quotes/latest"
+    symbols = list(dict.fromkeys(symbols))  # Drop duplicates, keep order
+    coin_index = {}
+
+    for start in range(0, len(symbols), CMC_QUOTES_BATCH_SIZE):
+        batch = symbols[start:start + CMC_QUOTES_BATCH_SIZE]
+        params = {"symbol": ",".join(batch), "convert": "USD", "skip_invalid": "true"}
+        quotes = http_client.get_json(quotes_url, params=params, headers=headers, breaker=cmc_breaker, **CMC_CACHE)
+
+        # The v2 endpoint returns a list of coins per symbol, keep the best ranked one
+        for symbol, coins in quotes["data"].items():
+            if coins:
+                coin_index[symbol] = min(coins, key=_listing_priority)
+
+    return coin_index
+
+def fetch_listings_throttled(headers):
+    """Return the full listing, pulling it at most every CMC_LISTINGS_INTERVAL seconds."""
+    fetched_at = last_listings["fetched_at"]
+    if fetched_at is None or time.time() - fetched_at >= CMC_LISTINGS_INTERVAL:
+        last_listings.update(fetched_at=time.time(), snapshot=fetch_listings(headers))
+
+    return last_listings["snapshot"]
+
+def _cmc_headers():
+    return {
+        'Accepts': 'application/json',
+        'X-CMC_PRO_API_KEY': COINMARKETCAP_API_KEY,
     }
-    response = requests.post(url, json=payload)
-    if not response.ok:
-        print("ERROR: Failed to send Telegram message")
-
-def fetch_crypto_market_data(symbols):
-    try:
-        headers = {
-            'Accepts': 'application/json',
-            'X-CMC_PRO_API_KEY': COINMARKETCAP_API_KEY,
-        }
 
-        # Fetch global market data (for total market cap and dominance)
-        global_url = "https://pro-api.coinmarketcap.com/v1/global-metrics/quotes/latest"
-        global_response = requests.get(global_url, headers=headers)
-        global_response.raise_for_status()
-        global_data = global_response.json()
-
-        # Fetch cryptocurrency data (for individual symbols)
-        coins_url = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/listings/latest"
-        params = {"start": 1, "limit": 3500, "convert": "USD"}
-        coins_response = requests.get(coins_url, headers=headers, params=params)
-        coins_response.raise_for_status()
-        coins_data = coins_response.json()["data"]
-
-        # Find top gainer and loser across all cryptocurrencies
-        top_gainer = max(
-            (coin for coin in coins_data if coin["quote"]["USD"].get("percent_change_24h") is not None),
-            key=lambda x: x["quote"]["USD"]["percent_change_24h"],
-            default=None
-        )
-        top_loser = min(
-            (coin for coin in coins_data if coin["quote"]["USD"].get("percent_change_24h") is not None),
-            key=lambda x: x["quote"]["USD"]["percent_change_24h"],
-            default=None
-        )
+def fetch_global_metrics():
+    """Fetch total market cap and dominance metrics from CoinMarketCap."""
+    global_url = f"{COINMARKETCAP_API_URL}/v1/global-metrics/quotes/latest"
+    global_data = http_client.get_json(global_url, headers=_cmc_headers(), breaker=cmc_breaker, **CMC_CACHE)
+
+    bitcoin_dominance = global_data["data"]["btc_dominance"]
+    ethereum_dominance = global_data["data"]["eth_dominance"]
+    return {
+        "total_market_cap": global_data["data"]["quote"]["USD"]["total_market_cap"],
+        "bitcoin_dominance": bitcoin_dominance,
+        "ethereum_dominance": ethereum_dominance,
+        "altcoin_dominance": 100 - bitcoin_dominance - ethereum_dominance,
+    }
 
-        # Extract total market cap and dominance metrics
-        total_market_cap = global_data["data"]["quote"]["USD"]["total_market_cap"]
-        bitcoin_dominance = global_data["data"]["btc_dominance"]
-        ethereum_dominance = global_data["data"]["eth_dominance"]
-        altcoin_dominance = 100 - bitcoin_dominance - ethereum_dominance
+def fetch_coin_data(symbols):
+    """Fetch prices for the requested symbols plus the top gainer and loser."""
+    headers = _cmc_headers()
+
+    # Fetch cryptocurrency data (for individual symbols)
+    if CMC_FETCH_MODE == "quotes":
+        quotes = MarketSnapshot.from_listings(fetch_quotes_by_symbol(symbols, headers).values())
+        listings = fetch_listings_throttled(headers)
+    else:
+        quotes = listings = fetch_listings(headers)
+
+    gainers, losers = listings.top_movers(1)
+    return {
+        "filtered_data": quotes.select(symbols),
+        "top_gainer": gainers[0] if gainers else None,
+        "top_loser": losers[0] if losers else None,
+        "movers": listings.movers(MOVERS_COUNT, MOVERS_BANDS, MOVERS_MIN_VOLUME) if MOVERS_COUNT > 0 else None,
+    }
 
-        # Filter data for the requested symbols
-        filtered_data = {}
-        for symbol in symbols:
-            coin_data = next((coin for coin in coins_data if coin["symbol"] == symbol), None)
-            if coin_data:
-                filtered_data[symbol] = {
-                    "name": coin_data["name"],
-                    "price": coin_data["quote"]["USD"].get("price"),
-                    "change_24h": coin_data["quote"]["USD"].get("percent_change_24h"),
-                }
-
-        return {
-            "filtered_data": filtered_data,
-            "top_gainer": {"name": top_gainer["name"], "symbol": top_gainer["symbol"],
-                           "change": top_gainer["quote"]["USD"]["percent_change_24h"]} if top_gainer else None,
-            "top_loser": {"name": top_loser["name"], "symbol": top_loser["symbol"],
-                          "change": top_loser["quote"]["USD"]["percent_change_24h"]} if top_loser else None,
-            "total_market_cap": total_market_cap,
-            "bitcoin_dominance": bitcoin_dominance,
-            "ethereum_dominance": ethereum_dominance,
-            "altcoin_dominance": altcoin_dominance,
-        }
+def fetch_crypto_market_data(symbols):
+    try:
+        market_data = fetch_coin_data(symbols)
+        market_data.update(fetch_global_metrics())
+        return market_data
     except Exception as e:
         logging.error(f"Failed to fetch crypto market data: {e}")
         return None
@@ -112,10 +188,8 @@ def fetch_crypto_market_data(symbols):
 def fetch_fear_and_greed_index():
     """Fetch the Fear & Greed Index."""
     try:
-        url = "https://api.alternative.me/fng/"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        url = f"{FEAR_AND_GREED_API_URL}/fng/"
+        data = http_client.get_json(url, breaker=fear_and_greed_breaker, **FEAR_AND_GREED_CACHE)
 
         fear_and_greed_index = data["data"][0]["value"]
         sentiment = data["data"][0]["value_classification"]
@@ -133,10 +207,8 @@ def fetch_market_dominance():
             'X-CMC_PRO_API_KEY': COINMARKETCAP_API_KEY,
         }
 
-        url = "https://pro-api.coinmarketcap.com/v1/global-metrics/quotes/latest"
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        data = response.json()
+        url = f"{COINMARKETCAP_API_URL}/v1/global-metrics/quotes/latest"
+        data = http_client.get_json(url, headers=headers, breaker=cmc_breaker, **CMC_CACHE)
 
         bitcoin_dominance = data['data']['btc_dominance']
         ethereum_dominance = data['data']['eth_dominance']
@@ -149,122 +221,220 @@ def fetch_market_dominance():
         print(f"ERROR: Failed to fetch market dominance: {e}")
         return None, None, None
 
-def send_crypto_market_update(market_data, fear_and_greed_index, sentiment):
-    global previous_dominance  # Use the global variable to persist BTC dominance across calls
-    global previous_prices  # Track previous prices for each cryptocurrency
-
-    if market_data:
-        current_time = datetime.now().strftime('%H:%M')
-
-        # Construct hyperlinks for tickers
-        def construct_hyperlink(name):
-            # Generate a CoinMarketCap URL based on the name
-            return f"https://www.coinmarketcap.com/currencies/{name.lower().replace(' ', '-')}/"
-
-        # Construct the message dynamically for all cryptocurrencies in market_data
-        crypto_updates = []
-        for symbol, data in market_data["filtered_data"].items():
-            if data['price'] is not None:  # Skip entries with missing price
-                link = construct_hyperlink(data['name'])
-
-                # Format price based on its value
-                price_format = f"${data['price']:.4f}" if data['price'] < 1 else f"${data['price']:.2f}"
-
-                emoji = "💰"
-
-                # Calculate price difference from the previous iteration
-                previous_price = previous_prices.get(symbol)
-                if previous_price is not None:
-                    price_difference = data['price'] - previous_price
-
-                    # Add 📈 for positive and 📉 for negative differences
-                    if price_difference > 0:
-                        emoji = "📈"
-                    elif price_difference < 0:
-                        emoji = "📉"
-                    elif price_difference == 0:
-                        emoji = "➖"
-
-                    formatted_difference = f"({price_difference:+.4f})" if data['price'] < 1 else f"({price_difference:+.2f})"
-                else:
-                    formatted_difference = ""
-
-                # Update the tracked price for this symbol
-                previous_prices[symbol] = data['price']
-
-                # Append the update message without iteration count
-                crypto_updates.append(
-                    f"{emoji} <a href='{link}'>{data['name']} ({symbol})</a>: {price_format} {formatted_difference}"
-                )
-        crypto_updates = "\n".join(crypto_updates)
-
-        # Construct hyperlinks for top gainer and top loser
-        gainer_link = construct_hyperlink(market_data["top_gainer"]["name"]) if market_data.get("top_gainer") else None
-        loser_link = construct_hyperlink(market_data["top_loser"]["name"]) if market_data.get("top_loser") else None
-
-        # Include Top Gainer and Top Loser with hyperlinks
-        gainer_text = (
-            f"🔥 Top Gainer: <a href='{gainer_link}'>{market_data['top_gainer']['name']} ({market_data['top_gainer']['symbol']})</a> "
-            f"(+{market_data['top_gainer']['change']:.2f}%)\n" if gainer_link else ""
-        )
+def fetch_market_update_data(symbols, deadline=None):
+    """Fetch CoinMarketCap and Fear & Greed data concurrently within a per-cycle deadline.
 
-        loser_text = (
-            f"❄️ Top Loser: <a href='{loser_link}'>{market_data['top_loser']['name']} ({market_data['top_loser']['symbol']})</a> "
-            f"({market_data['top_loser']['change']:.2f}%)\n\n" if loser_link else ""
-        )
+    Sources that fail or miss the deadline are listed under "missing" and their fields
+    are left as None, so the update can still go out with whatever arrived.
+    Returns None when no source delivered anything.
+    """
+    deadline = MARKET_FETCH_DEADLINE if deadline is None else deadline
 
-        # Handle Bitcoin dominance changes
-        bitcoin_dominance = market_data["bitcoin_dominance"]
-        previous_value = previous_dominance.get("btc_dominance")
+    def timed(source, func, *args):
+        with metrics.span("market_fetch", source=source):
+            return func(*args)
 
-        if previous_value is not None:
-            # Calculate the difference (not absolute)
-            dominance_difference = bitcoin_dominance - previous_value
-            formatted_difference = f"{dominance_difference:+.2f}"  # Decimal format with "+" or "-"
-            dominance_change_text = f"{bitcoin_dominance:.2f} ({formatted_difference})"
+    futures = {
+        "coin_data": fetch_executor.submit(timed, "coin_data", fetch_coin_data, symbols),
+        "global_metrics": fetch_executor.submit(timed, "global_metrics", fetch_global_metrics),
+        "fear_and_greed": fetch_executor.submit(timed, "fear_and_greed", fetch_fear_and_greed_index),
+    }
+    done, _ = wait(futures.values(), timeout=deadline)
+
+    market_data = {
+        "filtered_data": None, "top_gainer": None, "top_loser": None, "movers": None,
+        "total_market_cap": None, "bitcoin_dominance": None,
+        "ethereum_dominance": None, "altcoin_dominance": None,
+        "fear_and_greed_index": None, "sentiment": None,
+        "missing": [],
+    }
+    for source, future in futures.items():
+        if future not in done:
+            logging.warning(f"{source} missed the {deadline}s market update deadline")
+            market_data["missing"].append(source)
+            metrics.increment("market_source_missing", source=source, reason="deadline")
+            continue
+        try:
+            result = future.result()
+        except Exception as e:
+            logging.error(f"Failed to fetch {source}: {e}")
+            market_data["missing"].append(source)
+            reason = "circuit_open" if isinstance(e, CircuitOpenError) else "error"
+            metrics.increment("market_source_missing", source=source, reason=reason)
+            continue
+
+        if source == "fear_and_greed":
+            fear_and_greed_index, sentiment = result
+            if fear_and_greed_index is None:
+                market_data["missing"].append(source)
+                metrics.increment("market_source_missing", source=source, reason="error")
+            market_data.update(fear_and_greed_index=fear_and_greed_index, sentiment=sentiment)
         else:
-            # No previous value, just display the current dominance
-            dominance_change_text = f"{bitcoin_dominance:.2f}"
-
-        # Update the previous value (persist across function calls)
-        previous_dominance["btc_dominance"] = bitcoin_dominance
-
-        # Construct the full message
-        message = (
-            f"📈 <b>Crypto Market Update</b>\n\n"
-            f"{crypto_updates}\n\n"
-            f"{gainer_text}"
-            f"{loser_text}"
-            f"🌐 Total Market Cap: ${market_data['total_market_cap'] / 1e12:.2f}T\n"
-            f"📊 BTC Dominance: {dominance_change_text}%\n"
-            f"📊 ETH Dominance: {market_data['ethereum_dominance']:.2f}%\n"
-            f"📊 Altcoin Dominance: {market_data['altcoin_dominance']:.2f}%\n"
-            f"😨 Fear & Greed Index: {fear_and_greed_index} ({sentiment})\n\n"
-            f"🕒 Sent at: {current_time}"
-        )
-
-        # Send the message via Telegram
-        send_telegram_message(message)
-
-def monitor_market_updates():
-    """Monitor and send regular market updates."""
-    while True:
-        symbols = load_tickers()
+            market_data.update(result)
 
-        # Fetch general market data and Fear & Greed Index
-        market_data = fetch_crypto_market_data(symbols)
+    if len(market_data["missing"]) == len(futures):
+        return None
+    return market_data
+
+def render_crypto_market_update(market_data, fear_and_greed_index, sentiment, symbols=None, template=None,
+                                line_cache=None, delta=False):
+    """Render the market update for symbols (default: every fetched symbol) as a list of messages.
+
+    Changes are shown against previous_prices and previous_dominance, which are
+    left untouched so several chats can be rendered from the same cycle.
+    """
+    if not market_data:
+        return []
+    market_data = dict(market_data, fear_and_greed_index=fear_and_greed_index, sentiment=sentiment)
+    return market_renderer.render(
+        market_data, symbols, previous_prices, previous_dominance, template,
+        sent_at=datetime.now().strftime('%H:%M'), line_cache=line_cache, delta=delta,
+    )
+
+def changed_symbols(filtered_data):
+    """The fetched symbols whose price moved significantly since it was last sent."""
+    return {
+        symbol for symbol, data in (filtered_data or {}).items()
+        if data["price"] is not None and is_significant(previous_prices.get(symbol), data["price"])
+    }
 
-        fear_and_greed_index, sentiment = fetch_fear_and_greed_index()
+def send_crypto_market_update(market_data, fear_and_greed_index, sentiment, chats=None, templates=None):
+    """Send the market update to each chat in chats, {chat_id: symbols}, in the chat's template.
 
-        # Send market update if data is available
-        if market_data:
-            send_crypto_market_update(market_data, fear_and_greed_index, sentiment)
+    Defaults to the CHAT_ID chat with every fetched symbol. templates maps
+    chat_id to a template name; chats without one use MARKET_TEMPLATE.
+    """
+    global previous_dominance  # Use the global variable to persist BTC dominance across calls
+    global previous_prices  # Track previous prices for each cryptocurrency
 
-        # Timer for the next market update (30-minute interval with 10-second increments)
-        for remaining in range(1800, 0, -10):  # Countdown from 1800 seconds (30 minutes) in steps of 10 seconds
-            minutes, seconds = divmod(remaining, 60)
-            logging.info(f"Next market update in: {minutes:02d}:{seconds:02d}")
-            time.sleep(10)
+    if not market_data:
+        return
+
+    # In delta mode only tickers that moved past the thresholds are sent, with a full digest now and then
+    full_digest = not delta_mode() or digest_clock.due("market")
+    changed = None if full_digest else changed_symbols(market_data["filtered_data"])
+
+    # Render one tailored update per chat from the same fetched data; ticker lines are shared
+    line_cache = {}
+    sent_symbols = set()
+    for chat_id, symbols in (chats or {None: None}).items():
+        symbols = list(market_data["filtered_data"] or {}) if symbols is None else symbols
+        if changed is not None:
+            symbols = [symbol for symbol in symbols if symbol in changed]
+            if not symbols:
+                continue
+        with metrics.span("render", message="market"):
+            messages = render_crypto_market_update(
+                market_data, fear_and_greed_index, sentiment, symbols,
+                template=(templates or {}).get(chat_id), line_cache=line_cache, delta=changed is not None,
+            )
+        for message in messages:
+            send_telegram_message(message, chat_id)
+        sent_symbols.update(symbols)
+
+    if changed is not None and not sent_symbols:
+        logging.info("No significant market changes for any chat, skipping update")
+        metrics.increment("market_updates_skipped")
+        return
+
+    # Update the tracked prices once every chat has its message, but only those that were sent, so
+    # in delta mode small moves keep adding up against the last sent price until they cross a threshold
+    for symbol in sent_symbols:
+        data = (market_data["filtered_data"] or {}).get(symbol)
+        if data and data['price'] is not None:
+            previous_prices[symbol] = data['price']
+    if changed is not None:
+        return
+    digest_clock.mark("market")
+    if market_data["bitcoin_dominance"] is not None:
+        previous_dominance["btc_dominance"] = market_data["bitcoin_dominance"]
+
+def market_samples(market_data):
+    """The prices and market metrics of an update, keyed by history series name."""
+    samples = {f"price:{symbol}": data["price"] for symbol, data in (market_data["filtered_data"] or {}).items()}
+    samples.update({
+        "market:total_market_cap": market_data["total_market_cap"],
+        "dominance:btc": market_data["bitcoin_dominance"],
+        "dominance:eth": market_data["ethereum_dominance"],
+        "fear_and_greed": market_data.get("fear_and_greed_index"),
+    })
+    return samples
+
+def record_market_history(market_data):
+    """Append the prices and market metrics of an update to the history store."""
+    try:
+        default_store().append_many(market_samples(market_data))
+    except Exception as e:
+        logging.error(f"ERROR: Failed to record market history: {e}")
+
+def send_market_alerts(market_data, chats):
+    """Feed an update's samples to the alert engine and send the alerts that fire.
+
+    Price alerts go to the chats following that ticker, other market alerts to every chat.
+    """
+    current_time = datetime.now().strftime('%H:%M')
+    for series, value in market_samples(market_data).items():
+        if value is None:
+            continue
+        fired = alert_engine.evaluate(series, value)
+        if not fired:
+            continue
+        if series.startswith("price:"):
+            symbol = series.split(":", 1)[1]
+            followers = [chat_id for chat_id, tickers in chats.items() if symbol in tickers]
+        else:
+            followers = list(chats)
+        for rule in fired:
+            alert_message = f"🚨 <b>Market Alert</b>\n⚠️ {rule.describe(value)}\n🕒 Sent at: {current_time}"
+            for chat_id in alert_chats(rule, followers):
+                send_telegram_message(alert_message, chat_id)
+
+def restore_previous_values():
+    """Seed previous_prices and previous_dominance from the history store after a restart."""
+    try:
+        history = default_store()
+        previous_prices.update({
+            series.split(":", 1)[1]: value for series, value in history.latest("price:").items()
+        })
+        previous_dominance["btc_dominance"] = history.last("dominance:btc")
+    except Exception as e:
+        logging.error(f"ERROR: Failed to restore market history: {e}")
+
+def run_market_update(config=config):
+    """Fetch market data once for every subscribed chat and send each chat its own update."""
+    chats = chat_subscriptions(config)
+    if not chats:
+        logging.warning("No chats to send market updates to")
+        return
+    symbols = all_tickers(chats)
+
+    # Fetch general market data and Fear & Greed Index concurrently
+    market_data = fetch_market_update_data(symbols)
+    prices = {symbol: data["price"] for symbol, data in ((market_data or {}).get("filtered_data") or {}).items()}
+    market_polling.observe(prices, rate_limited=cmc_breaker.rate_limited)
+
+    # Send market update if any data is available
+    if market_data:
+        chat_tickers = {chat_id: subscription["tickers"] for chat_id, subscription in chats.items()}
+        send_crypto_market_update(
+            market_data, market_data["fear_and_greed_index"], market_data["sentiment"], chats=chat_tickers,
+            templates={chat_id: subscription.get("template") for chat_id, subscription in chats.items()},
+        )
+        alert_engine.set_rules(build_rules(config))
+        send_market_alerts(market_data, chat_tickers)
+        record_market_history(market_data)
+
+def monitor_market_updates(config=config):
+    """Monitor and send regular market updates.
+
+    config provides tickers(), portfolios() and subscriptions(); it defaults to the JSON file watcher.
+    """
+    restore_previous_values()
+    metrics.start_metrics_server()
+    run_forever(
+        "Market update", lambda: run_market_update(config), MARKET_UPDATE_INTERVAL,
+        interval_func=market_polling.interval if ADAPTIVE_POLLING else None,
+    )
 
 if __name__ == "__main__":
     from threading import Thread
@@ -0,0 +1,178 @@
+import heapq
+import math
+import time
+from array import array
+
+MISSING = float("nan")  # Stored in place of values the listing does not have
+
+
+def parse_bands(text):
+    """Parse "name:min:max,..." market-cap bands; an empty bound is open."""
+    bands = []
+    for band in filter(None, (part.strip() for part in text.split(","))):
+        name, low, high = band.rsplit(":", 2)
+        bands.append((name, float(low) if low else None, float(high) if high else None))
+    return bands
+
+
+def _number(value):
+    return MISSING if value is None else float(value)
+
+
+class MarketSnapshot:
+    """One market listing held as parallel arrays, one row per coin.
+
+    Numbers live in array("d") columns (NaN when missing), so a full 3,500-coin
+    listing takes a few hundred KiB and can be kept around between cycles. When
+    several coins share a symbol, the symbol index points at the best ranked one.
+    """
+
+    def __init__(self, taken_at=None):
+        self.taken_at = time.time() if taken_at is None else taken_at
+        self.symbols = []
+        self.names = []
+        self.slugs = []
+        self.ids = array("q")
+        self.ranks = array("d")
+        self.prices = array("d")
+        self.changes = array("d")  # 24h change in percent
+        self.market_caps = array("d")
+        self.volumes = array("d")  # 24h volume
+        self._index = {}
+
+    @classmethod
+    def from_listings(cls, coins, taken_at=None):
+        """Build a snapshot from CoinMarketCap coin dicts (any iterable, e.g. a stream)."""
+        snapshot = cls(taken_at)
+        for coin in coins:
+            snapshot.append(coin)
+        return snapshot
+
+    def append(self, coin):
+        quote = coin["quote"]["USD"]
+        row = len(self.symbols)
+        symbol = coin["symbol"]
+        self.symbols.append(symbol)
+        self.names.append(coin["name"])
+        self.slugs.append(coin.get("slug"))
+        self.ids.append(coin.get("id") or 0)
+        self.ranks.append(_number(coin.get("cmc_rank")))
+        self.prices.append(_number(quote.get("price")))
+        self.changes.append(_number(quote.get("percent_change_24h")))
+        self.market_caps.append(_number(quote.get("market_cap")))
+        self.volumes.append(_number(quote.get("volume_24h")))
+
+        current = self._index.get(symbol)
+        if current is None or self._priority(row) < self._priority(current):
+            self._index[symbol] = row
+
+    def _priority(self, row):
+        rank = self.ranks[row]
+        return (math.inf if math.isnan(rank) else rank, self.ids[row])
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self._index
+
+    def row(self, symbol):
+        return self._index.get(symbol)
+
+    def coin(self, row):
+        """The fields of one row as a dict, with None for missing numbers."""
+        def value(column):
+            number = column[row]
+            return None if math.isnan(number) else number
+
+        return {
+            "symbol": self.symbols[row], "name": self.names[row], "slug": self.slugs[row],
+            "price": value(self.prices), "change_24h": value(self.changes),
+            "market_cap": value(self.market_caps), "volume_24h": value(self.volumes),
+        }
+
+    def select(self, symbols):
+        """{symbol: coin dict} for the requested symbols that are listed."""
+        return {symbol: self.coin(self._index[symbol]) for symbol in symbols if symbol in self._index}
+
+    def _rows_with_change(self):
+        changes = self.changes
+        return [row for row in range(len(changes)) if changes[row] == changes[row]]  # NaN != NaN
+
+    def top_movers(self, n=1):
+        """The n biggest 24h gainers and losers, as lists of coin dicts."""
+        rows = self._rows_with_change()
+        key = self.changes.__getitem__
+        gainers = heapq.nlargest(n, rows, key=key)
+        losers = heapq.nsmallest(n, rows, key=key)
+        return [self.coin(row) for row in gainers], [self.coin(row) for row in losers]
+
+    def movers(self, n, bands, min_volume=0.0):
+        """Top n gainers and losers per market-cap band, plus market breadth, in one pass.
+
+        bands is a list of (name, min_market_cap, max_market_cap) with None for an
+        open end. Coins below min_volume are left out of the movers but still count
+        towards breadth. Each band keeps two n-sized heaps, so the pass costs
+        O(coins * log n) whatever n and the number of bands.
+        """
+        bands = [(name, -math.inf if low is None else low, math.inf if high is None else high)
+                 for name, low, high in bands]
+        gainers = [[] for _ in bands]
+        losers = [[] for _ in bands]
+        advancers = decliners = unchanged = 0
+
+        for row, (change, market_cap, volume) in enumerate(zip(self.changes, self.market_caps, self.volumes)):
+            if change > 0:
+                advancers += 1
+            elif change < 0:
+                decliners += 1
+            elif change == 0:
+                unchanged += 1
+            else:
+                continue  # No 24h change
+            if not volume >= min_volume:  # Also skips NaN volumes
+                continue
+            for band, (_, low, high) in enumerate(bands):
+                if low <= market_cap < high and change != 0:
+                    # Min-heaps of the n largest gains and the n largest losses; a coin
+                    # only competes on the side its change is on
+                    heap, key = (gainers[band], change) if change > 0 else (losers[band], -change)
+                    if len(heap) < n:
+                        heapq.heappush(heap, (key, row))
+                    elif key > heap[0][0]:
+                        heapq.heapreplace(heap, (key, row))
+
+        return {
+            "bands": [
+                {
+                    "name": name,
+                    "gainers": [self.coin(row) for _, row in sorted(gainers[band], reverse=True)],
+                    "losers": [self.coin(row) for _, row in sorted(losers[band], reverse=True)],
+                }
+                for band, (name, _, _) in enumerate(bands)
+            ],
+            "breadth": {"advancers": advancers, "decliners": decliners, "unchanged": unchanged},
+            "advance_decline_ratio": advancers / decliners if decliners else None,
+        }
+
+    def to_dict(self):
+        """Plain lists, e.g. for the JSON-backed response cache."""
+        return {
+            "taken_at": self.taken_at, "symbols": self.symbols, "names": self.names, "slugs": self.slugs,
+            "ids": self.ids.tolist(), "ranks": self.ranks.tolist(), "prices": self.prices.tolist(),
+            "changes": self.changes.tolist(), "market_caps": self.market_caps.tolist(),
+            "volumes": self.volumes.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        snapshot = cls(data["taken_at"])
+        snapshot.symbols, snapshot.names, snapshot.slugs = data["symbols"], data["names"], data["slugs"]
+        snapshot.ids = array("q", data["ids"])
+        for column in ("ranks", "prices", "changes", "market_caps", "volumes"):
+            setattr(snapshot, column, array("d", data[column]))
+        for row, symbol in enumerate(snapshot.symbols):
+            current = snapshot._index.get(symbol)
+            if current is None or snapshot._priority(row) < snapshot._priority(current):
+                snapshot._index[symbol] = row
+        return snapshot
@@ -0,0 +1,196 @@
+import html
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+MISSING_TEXT = "n/a"  # Shown in place of fields whose source failed or missed the deadline
+
+# Sections of the market update, in order, for each template a chat can pick with /template
+MARKET_TEMPLATES = {
+    "full": ("header", "tickers", "top_movers", "movers", "market", "footer"),
+    "standard": ("header", "tickers", "top_movers", "market", "footer"),
+    "compact": ("header", "tickers", "footer"),
+}
+MARKET_TEMPLATE = os.getenv("MARKET_TEMPLATE", "full")  # Used by chats that did not pick one
+DELTA_SECTIONS = ("delta_header", "tickers", "footer")  # Delta updates between full digests
+
+
+def coin_url(slug):
+    return f"https://www.coinmarketcap.com/currencies/{slug}/"
+
+
+def format_price(price):
+    return f"${price:.4f}" if price < 1 else f"${price:.2f}"
+
+
+def format_optional(value, template):
+    return template.format(value) if value is not None else MISSING_TEXT
+
+
+def split_message(text, limit=TELEGRAM_MESSAGE_LIMIT):
+    """Split text into messages of at most limit characters.
+
+    Messages are filled line by line, so they only break between lines; a line
+    longer than limit on its own is cut.
+    """
+    if len(text) <= limit:
+        return [text]
+
+    messages = []
+    current = ""
+    for paragraph in text.split("\n\n"):
+        separator = "\n\n"
+        for line in paragraph.split("\n"):
+            while len(line) > limit:
+                if current:
+                    messages.append(current)
+                    current = ""
+                messages.append(line[:limit])
+                line = line[limit:]
+            candidate = f"{current}{separator}{line}" if current else line
+            if len(candidate) <= limit:
+                current = candidate
+            else:
+                messages.append(current)
+                current = line
+            separator = "\n"
+    if current:
+        messages.append(current)
+    return messages
+
+
+class MarketRenderer:
+    """Renders market updates from cached per-symbol parts.
+
+    The link and display name of each coin are built once from CoinMarketCap's
+    slug and kept until the coin's name or slug changes; only the price, its
+    change and the emoji are formatted each cycle. A line cache passed to
+    render() lets every chat of one cycle reuse the same ticker lines.
+    """
+
+    def __init__(self):
+        self._static = {}  # {symbol: ((name, slug), "<a href=...>Name (SYM)</a>: ")}
+
+    def coin_label(self, symbol, coin):
+        """Cached "<a href=...>Name (SYM)</a>" for a coin dict with name and slug."""
+        identity = (coin["name"], coin.get("slug"))
+        cached = self._static.get(symbol)
+        if cached is None or cached[0] != identity:
+            # Fall back to a slug guessed from the name when the source did not give one
+            slug = coin.get("slug") or coin["name"].lower().replace(" ", "-")
+            label = f"<a href='{coin_url(slug)}'>{html.escape(coin['name'])} ({html.escape(symbol)})</a>"
+            cached = self._static[symbol] = (identity, label)
+        return cached[1]
+
+    def ticker_line(self, symbol, coin, previous_price):
+        price = coin["price"]
+        if previous_price is None:
+            return f"💰 {self.coin_label(symbol, coin)}: {format_price(price)} "
+
+        difference = price - previous_price
+        emoji = "📈" if difference > 0 else "📉" if difference < 0 else "➖"
+        formatted_difference = f"({difference:+.4f})" if price < 1 else f"({difference:+.2f})"
+        return f"{emoji} {self.coin_label(symbol, coin)}: {format_price(price)} {formatted_difference}"
+
+    def _tickers(self, market_data, symbols, previous_prices, line_cache):
+        filtered_data = market_data["filtered_data"]
+        lines = [] if filtered_data is not None else ["⚠️ Ticker prices unavailable"]
+        filtered_data = filtered_data or {}
+        for symbol in (filtered_data if symbols is None else symbols):
+            line = line_cache.get(symbol)
+            if line is None:
+                coin = filtered_data.get(symbol)
+                if not coin or coin["price"] is None:  # Skip entries with missing price
+                    continue
+                line = line_cache[symbol] = self.ticker_line(symbol, coin, previous_prices.get(symbol))
+            lines.append(line)
+        return "\n".join(lines)
+
+    def _top_movers(self, market_data):
+        lines = []
+        if market_data.get("top_gainer"):
+            gainer = market_data["top_gainer"]
+            lines.append(f"🔥 Top Gainer: {self.coin_label(gainer['symbol'], gainer)} (+{gainer['change_24h']:.2f}%)")
+        if market_data.get("top_loser"):
+            loser = market_data["top_loser"]
+            lines.append(f"❄️ Top Loser: {self.coin_label(loser['symbol'], loser)} ({loser['change_24h']:.2f}%)")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _movers(market_data):
+        movers = market_data.get("movers")
+        if not movers:
+            return ""
+
+        def format_coins(coins):
+            return ", ".join(f"{coin['symbol']} {coin['change_24h']:+.1f}%" for coin in coins)
+
+        lines = ["🏁 <b>Movers (24h)</b>"]
+        for band in movers["bands"]:
+            if band["gainers"] or band["losers"]:
+                lines.append(f"<b>{band['name']}</b>")
+                if band["gainers"]:
+                    lines.append(f"🟢 {format_coins(band['gainers'])}")
+                if band["losers"]:
+                    lines.append(f"🔴 {format_coins(band['losers'])}")
+
+        breadth = movers["breadth"]
+        ratio = movers["advance_decline_ratio"]
+        ratio_text = f" (A/D {ratio:.2f})" if ratio is not None else ""
+        lines.append(f"⚖️ Breadth: {breadth['advancers']} up / {breadth['decliners']} down{ratio_text}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _market(market_data, previous_dominance):
+        bitcoin_dominance = market_data["bitcoin_dominance"]
+        previous_value = previous_dominance.get("btc_dominance")
+        if bitcoin_dominance is None:
+            dominance_change_text = MISSING_TEXT
+        elif previous_value is not None:
+            dominance_change_text = f"{bitcoin_dominance:.2f} ({bitcoin_dominance - previous_value:+.2f})%"
+        else:
+            dominance_change_text = f"{bitcoin_dominance:.2f}%"
+
+        total_market_cap = market_data["total_market_cap"]
+        total_market_cap_text = f"${total_market_cap / 1e12:.2f}T" if total_market_cap is not None else MISSING_TEXT
+        fear_and_greed_index = market_data.get("fear_and_greed_index")
+        fear_and_greed_text = (
+            f"{fear_and_greed_index} ({market_data.get('sentiment')})" if fear_and_greed_index is not None else MISSING_TEXT
+        )
+        return (
+            f"🌐 Total Market Cap: {total_market_cap_text}\n"
+            f"📊 BTC Dominance: {dominance_change_text}\n"
+            f"📊 ETH Dominance: {format_optional(market_data['ethereum_dominance'], '{:.2f}%')}\n"
+            f"📊 Altcoin Dominance: {format_optional(market_data['altcoin_dominance'], '{:.2f}%')}\n"
+            f"😨 Fear & Greed Index: {fear_and_greed_text}"
+        )
+
+    def render(self, market_data, symbols=None, previous_prices=None, previous_dominance=None,
+               template=None, sent_at="", line_cache=None, delta=False):
+        """Render one chat's market update as a list of messages, each within Telegram's limit.
+
+        symbols defaults to every fetched symbol. Pass the same line_cache dict for
+        every chat of one cycle so each ticker line is formatted only once. A delta
+        update only carries the ticker lines, whatever the chat's template.
+        """
+        previous_prices = previous_prices or {}
+        previous_dominance = previous_dominance or {}
+        line_cache = {} if line_cache is None else line_cache
+
+        sections = {
+            "header": lambda: "📈 <b>Crypto Market Update</b>",
+            "delta_header": lambda: "📈 <b>Crypto Market Changes</b>",
+            "tickers": lambda: self._tickers(market_data, symbols, previous_prices, line_cache),
+            "top_movers": lambda: self._top_movers(market_data),
+            "movers": lambda: self._movers(market_data),
+            "market": lambda: self._market(market_data, previous_dominance),
+            "footer": lambda: f"🕒 Sent at: {sent_at}",
+        }
+        names = DELTA_SECTIONS if delta else MARKET_TEMPLATES.get(template or MARKET_TEMPLATE, MARKET_TEMPLATES["full"])
+        text = "\n\n".join(filter(None, (sections[name]() for name in names)))
+        return split_message(text)
+
+
+market_renderer = MarketRenderer()
@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Local Prometheus-style endpoint at http://METRICS_ADDRESS:METRICS_PORT/metrics; port 0 disables it
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
+METRICS_ADDRESS = os.getenv("METRICS_ADDRESS", "127.0.0.1")
+# Directory for per-cycle profile dumps (one JSON line per cycle); empty disables them
+METRICS_PROFILE_DIR = os.getenv("METRICS_PROFILE_DIR", "")
+
+METRIC_PREFIX = "crypto_bot_"
+
+
+def _key(name, labels):
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+class Registry:
+    """Thread-safe counters and timing summaries, keyed by name and labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}  # {(name, labels): value}
+        self.timings = {}  # {(name, labels): [count, total_seconds, max_seconds]}
+
+    def increment(self, name, amount=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            timing = self.timings.setdefault(key, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Time the block as name; an exception also counts towards name_failures."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.increment(f"{name}_failures", **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counters), {key: list(timing) for key, timing in self.timings.items()}
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        counters, timings = self.snapshot()
+
+        def series(name, labels, suffix=""):
+            label_text = ",".join(f'{label}="{value}"' for label, value in labels)
+            return f"{METRIC_PREFIX}{name}{suffix}" + (f"{{{label_text}}}" if label_text else "")
+
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {METRIC_PREFIX}{name}_total counter")
+            for (counter_name, labels), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f"{series(name, labels, '_total')} {value}")
+        for name in sorted({name for name, _ in timings}):
+            lines.append(f"# TYPE {METRIC_PREFIX}{name}_seconds summary")
+            for (timing_name, labels), (count, total, maximum) in sorted(timings.items()):
+                if timing_name == name:
+                    lines.append(f"{series(name, labels, '_seconds_count')} {count}")
+                    lines.append(f"{series(name, labels, '_seconds_sum')} {total:.6f}")
+                    lines.append(f"{series(name, labels, '_seconds_max')} {maximum:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+increment = registry.increment
+observe = registry.observe
+span = registry.span
+
+
+def _label_text(key):
+    name, labels = key
+    return name + "".join(f",{label}={value}" for label, value in labels)
+
+
+@contextmanager
+def cycle_profile(name):
+    """Time a monitor cycle and, with METRICS_PROFILE_DIR set, dump what it spent per stage.
+
+    The dump is the change in every counter and timing over the cycle, so work
+    from other monitors running at the same time is included too.
+    """
+    before_counters, before_timings = registry.snapshot() if METRICS_PROFILE_DIR else ({}, {})
+    started_at = time.time()
+    try:
+        with span("cycle", job=name):
+            yield
+    finally:
+        if METRICS_PROFILE_DIR:
+            after_counters, after_timings = registry.snapshot()
+            profile = {
+                "cycle": name,
+                "started_at": started_at,
+                "duration": time.time() - started_at,
+                "timings": {
+                    _label_text(key): {"count": count - before_timings.get(key, [0, 0.0])[0],
+                                       "seconds": round(total - before_timings.get(key, [0, 0.0])[1], 6)}
+                    for key, (count, total, _) in after_timings.items()
+                    if count != before_timings.get(key, [0])[0]
+                },
+                "counters": {
+                    _label_text(key): value - before_counters.get(key, 0)
+                    for key, value in after_counters.items() if value != before_counters.get(key, 0)
+                },
+            }
+            try:
+                os.makedirs(METRICS_PROFILE_DIR, exist_ok=True)
+                with open(os.path.join(METRICS_PROFILE_DIR, f"profile-{name}.jsonl"), "a") as file:
+                    file.write(json.dumps(profile) + "\n")
+            except OSError as e:
+                logging.warning(f"Failed to write cycle profile: {e}")
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the log
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None, address=METRICS_ADDRESS):
+    """Serve /metrics in a background thread (once per process); returns the server or None if disabled."""
+    global _server
+    port = METRICS_PORT if port is None else port
+    with _server_lock:
+        if _server is None and port:
+            try:
+                _server = ThreadingHTTPServer((address, port), MetricsHandler)
+            except OSError as e:
+                logging.error(f"ERROR: Could not start metrics endpoint on {address}:{port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="Metrics", daemon=True).start()
+            logging.info(f"Serving metrics on http://{address}:{_server.server_port}/metrics")
+        return _server
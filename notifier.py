@@ -0,0 +1,193 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dotenv import load_dotenv
+
+import http_client
+import metrics
+from message_renderer import TELEGRAM_MESSAGE_LIMIT
+
+load_dotenv()
+
+# Telegram Bot Configuration
+TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')  # Replace with your bot token
+CHAT_ID = os.getenv('CHAT_ID')  # Replace with your chat ID
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+
+# Telegram allows about one message per second per chat and 30 per second overall
+TELEGRAM_CHAT_INTERVAL = float(os.getenv('TELEGRAM_CHAT_INTERVAL', 1.0))
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 25))
+# Coalescible messages queued for the same chat within this many seconds go out as one
+TELEGRAM_COALESCE_WINDOW = float(os.getenv('TELEGRAM_COALESCE_WINDOW', 2.0))
+TELEGRAM_MAX_ATTEMPTS = 5
+
+
+def post_telegram_message(message, chat_id=None):
+    """Send one message right away; returns (ok, retry_after seconds or None, retryable).
+
+    Connection errors, 429 and 5xx responses are retryable. Other 4xx responses, such
+    as malformed HTML (400) or a bot blocked by the chat (403), will never succeed.
+    """
+    url = f"{TELEGRAM_API_URL}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+    payload = {
+        'chat_id': chat_id or CHAT_ID,
+        'text': message,
+        'parse_mode': 'HTML',
+        "disable_web_page_preview": True
+    }
+    try:
+        response = http_client.post(url, json=payload, retry=False)
+    except Exception as e:
+        logging.error(f"ERROR: Failed to send Telegram message: {e}")
+        return False, None, True
+
+    if response.ok:
+        return True, None, False
+
+    retry_after = None
+    if response.status_code == 429:
+        try:
+            retry_after = response.json()["parameters"]["retry_after"]
+        except Exception:
+            retry_after = response.headers.get("Retry-After")
+        retry_after = float(retry_after) if retry_after is not None else None
+    logging.error(f"ERROR: Failed to send Telegram message ({response.status_code}): {response.text[:200]}")
+    return False, retry_after, response.status_code == 429 or response.status_code >= 500
+
+
+class OutboundMessage:
+    def __init__(self, chat_id, text, coalesce):
+        self.chat_id = chat_id
+        self.text = text
+        self.coalesce = coalesce
+        self.queued_at = time.monotonic()
+        self.attempts = 0
+
+
+class TelegramQueue:
+    """Outbound Telegram messages, delivered by a background thread.
+
+    Respects a per-chat and a global send rate, merges coalescible messages that
+    are due for the same chat at the same time into one message (up to Telegram's
+    4096 characters), and retries 429, 5xx and connection failures with backoff,
+    honouring retry_after. Other failures are dropped straight away. Callers never
+    block on the network.
+    """
+
+    def __init__(self, chat_interval=TELEGRAM_CHAT_INTERVAL, global_rate=TELEGRAM_GLOBAL_RATE,
+                 coalesce_window=TELEGRAM_COALESCE_WINDOW, max_attempts=TELEGRAM_MAX_ATTEMPTS, send=None):
+        self.chat_interval = chat_interval
+        self.global_interval = 1 / global_rate
+        self.coalesce_window = coalesce_window
+        self.max_attempts = max_attempts
+        self.send = send or post_telegram_message
+        self._condition = threading.Condition()
+        self._pending = {}  # chat_id -> deque of OutboundMessage
+        self._chat_ready_at = {}  # chat_id -> earliest monotonic time of the next send
+        self._global_ready_at = 0.0
+        self._in_progress = 0
+        self._thread = None
+        self.sent = 0
+        self.failed = 0
+
+    def enqueue(self, text, chat_id=None, coalesce=False):
+        chat_id = chat_id or CHAT_ID
+        with self._condition:
+            self._pending.setdefault(chat_id, deque()).append(OutboundMessage(chat_id, text, coalesce))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="TelegramSender", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _due_at(self, chat_id, messages):
+        first = messages[0]
+        due = max(self._chat_ready_at.get(chat_id, 0.0), self._global_ready_at)
+        if first.coalesce and first.attempts == 0:
+            due = max(due, first.queued_at + self.coalesce_window)
+        return due
+
+    def _next_batch(self):
+        """Wait for the chat that is due first and pop its next (possibly merged) message."""
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                due = {chat_id: self._due_at(chat_id, messages) for chat_id, messages in self._pending.items() if messages}
+                if due:
+                    chat_id = min(due, key=due.get)
+                    if due[chat_id] <= now:
+                        break
+                    self._condition.wait(timeout=due[chat_id] - now)
+                else:
+                    self._condition.wait()
+
+            messages = self._pending[chat_id]
+            batch = [messages.popleft()]
+            length = len(batch[0].text)
+            while (batch[0].coalesce and messages and messages[0].coalesce
+                   and length + 2 + len(messages[0].text) <= TELEGRAM_MESSAGE_LIMIT):
+                length += 2 + len(messages[0].text)
+                batch.append(messages.popleft())
+
+            self._global_ready_at = now + self.global_interval
+            self._chat_ready_at[chat_id] = now + self.chat_interval
+            self._in_progress += 1
+            return chat_id, batch
+
+    def _run(self):
+        while True:
+            chat_id, batch = self._next_batch()
+            ok, retry_after, retryable = False, None, True
+            try:
+                with metrics.span("telegram_send"):
+                    ok, retry_after, retryable = self.send("\n\n".join(message.text for message in batch), chat_id)
+            except Exception as e:
+                logging.error(f"ERROR: Telegram sender failed: {e}")
+
+            with self._condition:
+                self._in_progress -= 1
+                if ok:
+                    self.sent += len(batch)
+                    metrics.increment("telegram_messages_sent", len(batch))
+                else:
+                    for message in batch:
+                        message.attempts += 1
+                    retry = [message for message in batch if retryable and message.attempts < self.max_attempts]
+                    self.failed += len(batch) - len(retry)
+                    metrics.increment("telegram_send_failures", rate_limited=retry_after is not None)
+                    if retry:
+                        # Back off exponentially unless Telegram said how long to wait
+                        delay = retry_after if retry_after is not None else 2 ** retry[0].attempts
+                        self._chat_ready_at[chat_id] = time.monotonic() + delay
+                        self._pending[chat_id].extendleft(reversed(retry))
+                    else:
+                        metrics.increment("telegram_messages_dropped", len(batch))
+                        reason = f"after {self.max_attempts} attempts" if retryable else "rejected by Telegram"
+                        logging.error(f"ERROR: Dropping Telegram message for {chat_id} {reason}")
+                self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """Wait until every queued message is sent or dropped; returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._in_progress or any(self._pending.values()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(timeout=remaining)
+        return True
+
+
+telegram_queue = TelegramQueue()
+atexit.register(telegram_queue.flush, 10)
+
+
+def send_telegram_message(message, chat_id=None, coalesce=False):
+    """Queue a message for the Telegram bot; sent in the background.
+
+    Coalescible messages due for the same chat at the same time are merged into one.
+    """
+    telegram_queue.enqueue(message, chat_id, coalesce)
+    return True
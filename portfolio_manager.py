@@ -1,175 +1,486 @@
-import time
+import atexit
 import logging
+import math
 import os
-import json
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+
+import http_client
+import metrics
+from alert_engine import alert_chats, alert_engine, build_rules, portfolio_rule_id
+from browser_pool import WebDriverPool
+from circuit_breaker import ADAPTIVE_POLLING, AdaptivePolling, CircuitOpenError, breaker
+from delta_updates import DigestClock, delta_mode, is_significant
+from notifier import send_telegram_message
+from scheduler import run_forever
+from state_store import ConfigWatcher
+from subscriptions import chat_subscriptions, chats_by_portfolio
+from timeseries_store import default_store
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(threadName)s] %(message)s", datefmt="%H:%M:%S")
 
-TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-CHAT_ID = os.getenv("CHAT_ID")
-
-def send_telegram_message(message):
-    """Send a message via Telegram bot."""
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {
-        'chat_id': CHAT_ID,
-        'text': message,
-        'parse_mode': 'HTML',
-        "disable_web_page_preview": True
-    }
-    response = requests.post(url, json=payload)
-    if not response.ok:
-        print("ERROR: Failed to send Telegram message")
-
-def load_portfolios():
-    if os.path.exists("portfolios.json"):
-        with open("portfolios.json", "r") as file:
-            return json.load(file)
-    return []
+# Seconds between portfolio updates, aligned to the wall clock
+PORTFOLIO_UPDATE_INTERVAL = 600
+
+# Number of portfolios scraped in parallel, and the page load timeout for each scrape
+PORTFOLIO_CONCURRENCY = int(os.getenv("PORTFOLIO_CONCURRENCY", 1))
+PORTFOLIO_SCRAPE_TIMEOUT = int(os.getenv("PORTFOLIO_SCRAPE_TIMEOUT", 120))
+
+# Longest time to wait for a loaded portfolio page to show all of its values
+SCRAPE_DEADLINE = float(os.getenv("SCRAPE_DEADLINE", 20))
+
+# Sent by the plain HTTP backend so CoinStats serves the same page a browser gets
+BROWSER_USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+# Headless Chrome instances are reused across scrapes and recycled after BROWSER_MAX_PAGES pages
+browser_pool = WebDriverPool(
+    size=int(os.getenv("BROWSER_POOL_SIZE", PORTFOLIO_CONCURRENCY)),
+    max_pages=int(os.getenv("BROWSER_MAX_PAGES", 50)),
+    page_load_timeout=PORTFOLIO_SCRAPE_TIMEOUT,
+)
+atexit.register(browser_pool.close)
+
+# Watches the config files; each is only parsed again after it changes
+config = ConfigWatcher()
+
+def source_breaker(backend_name, portfolio_url):
+    """The breaker of one scraping backend against one portfolio host, e.g. "selenium:coinstats.app"."""
+    return breaker(f"{backend_name}:{urlparse(portfolio_url).hostname}")
 
 def get_portfolio_data_selenium(portfolio_url):
-    """Scrape portfolio data using Selenium."""
-    options = Options()
-    options.add_argument('--headless')
-    options.add_argument('--disable-gpu')
-    options.add_argument('--no-sandbox')
+    """Scrape portfolio data using Selenium.
 
-    # Initialize WebDriver
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    While the host keeps failing its breaker is open and no browser is launched at all.
+    """
+    def scrape():
+        with browser_pool.driver() as driver:
+            return _scrape_portfolio_page(driver, portfolio_url)
 
     try:
+        return source_breaker("selenium", portfolio_url).call(scrape)
+    except CircuitOpenError as e:
+        logging.info(f"Skipping Selenium scrape: {e}")
+        return None, None, None, None
+    except Exception as e:
+        logging.error(f"ERROR: Failed to fetch portfolio data: {e}")
+        return None, None, None, None
+
+# CoinStats CSS classes for the values read from a portfolio page
+USERNAME_SELECTORS = [
+    '.UserInfoMenuItemWithTitleAndDesc_user-data-with-title-and-desc__c2iGU h1',
+    '.UserInfoMenuItemWithTitleAndDesc_user-data-with-title-and-desc__c2iGU span',  # Fallback
+]
+TOTAL_VALUE_SELECTOR = '.PortfolioPriceInfo_PT-price-info_price__xjt40'
+PERCENTAGE_CHANGE_SELECTOR = '.PortfolioProfitInfo_percentText__3NKUK'
+MONEY_CHANGED_SELECTOR = '.PortfolioProfitInfo_PTProfitInfoPrice__79_kR'
+
+# Reads every value in a single round trip; missing elements come back as null
+READ_PORTFOLIO_VALUES_JS = """
+const [usernameSelectors, totalValueSelector, percentageSelector, moneySelector] = arguments;
+const title = (selector) => {
+    const element = document.querySelector(selector);
+    return element && element.getAttribute('title') ? element.getAttribute('title') : null;
+};
+const username = usernameSelectors
+    .map((selector) => document.querySelector(selector))
+    .map((element) => element && (element.getAttribute('title') || element.textContent.trim()))
+    .find((value) => value) || null;
+return {
+    username: username,
+    total_value: title(totalValueSelector),
+    percentage_change: title(percentageSelector),
+    money_changed: title(moneySelector),
+};
+"""
+
+def parse_portfolio_values(values):
+    """Convert the raw title strings read from a portfolio page into (username, total, percentage, money)."""
+    username = values.get("username")
+    if not username:
+        logging.error("Failed to locate username using all known selectors. Setting username as 'Unknown'")
+        username = "Unknown"
+
+    total_value = float(values["total_value"].strip("$").replace(",", ""))
+    percentage_change = float(values["percentage_change"].strip("%"))
+    money_changed = float(values["money_changed"].replace("$", "").replace(",", "").strip())
+    return username, total_value, percentage_change, money_changed
+
+def _scrape_portfolio_page(driver, portfolio_url):
+    """Read username, total value, 24h percentage and money changed from a portfolio page."""
+    with metrics.span("selenium_page_load"):
         driver.get(portfolio_url)
-        time.sleep(5)  # Allow page to load
-
-        # Locate the username (try multiple strategies)
-        username = None
-        try:
-            # First attempt: Using the original selector
-            username_element = WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, '.UserInfoMenuItemWithTitleAndDesc_user-data-with-title-and-desc__c2iGU h1'))
-            )
-            username = username_element.get_attribute("title") or username_element.text.strip()
-        except Exception as e:
-            logging.warning(f"First attempt to locate username failed: {e}")
 
-        if not username:
-            try:
-                # Second attempt: Alternative selector (fallback)
-                username_element_alt = WebDriverWait(driver, 15).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, '.UserInfoMenuItemWithTitleAndDesc_user-data-with-title-and-desc__c2iGU span'))
-                )
-                username = username_element_alt.get_attribute("title") or username_element_alt.text.strip()
-            except Exception as e:
-                logging.warning(f"Second attempt to locate username failed: {e}")
+    # Poll until every value is on the page, reading them all in one script call each time
+    last_values = {}
 
-        if not username:
-            logging.error("Failed to locate username using all known selectors. Setting username as 'Unknown'")
-            username = "Unknown"
+    def values_ready(current_driver):
+        last_values.update(current_driver.execute_script(
+            READ_PORTFOLIO_VALUES_JS, USERNAME_SELECTORS, TOTAL_VALUE_SELECTOR,
+            PERCENTAGE_CHANGE_SELECTOR, MONEY_CHANGED_SELECTOR,
+        ))
+        return all(last_values.values()) and last_values
 
-        # Locate total portfolio value
-        total_value = float(WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, '.PortfolioPriceInfo_PT-price-info_price__xjt40'))
-        ).get_attribute("title").strip("$").replace(",", ""))
+    try:
+        with metrics.span("selenium_wait_values"):
+            values = WebDriverWait(driver, SCRAPE_DEADLINE, poll_frequency=0.25).until(values_ready)
+    except TimeoutException:
+        # The username is optional, the numbers are not
+        if not all(last_values.get(key) for key in ("total_value", "percentage_change", "money_changed")):
+            raise
+        values = last_values
+
+    return parse_portfolio_values(values)
+
+class PortfolioPageParser(HTMLParser):
+    """Read the portfolio values from server-rendered CoinStats HTML, using the same selectors as Selenium.
+
+    Only supports the selector shapes used here: ".class" and ".class tag".
+    """
+
+    VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+    def __init__(self):
+        super().__init__()
+        self.values = {"username": None, "total_value": None, "percentage_change": None, "money_changed": None}
+        self._title_classes = {
+            TOTAL_VALUE_SELECTOR.lstrip("."): "total_value",
+            PERCENTAGE_CHANGE_SELECTOR.lstrip("."): "percentage_change",
+            MONEY_CHANGED_SELECTOR.lstrip("."): "money_changed",
+        }
+        # [(container class, tag)] in order of preference
+        self._username_selectors = [tuple(selector.lstrip(".").split(" ")) for selector in USERNAME_SELECTORS]
+        self._usernames = [None] * len(self._username_selectors)
+        self._open_classes = []  # Class set of every open element
+        self._capturing = []  # [(username selector index, depth, text parts)]
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = set((attrs.get("class") or "").split())
+
+        for class_name in classes & self._title_classes.keys():
+            key = self._title_classes[class_name]
+            if self.values[key] is None and attrs.get("title"):
+                self.values[key] = attrs["title"]
+
+        for index, (container_class, username_tag) in enumerate(self._username_selectors):
+            if (self._usernames[index] is None and tag == username_tag
+                    and any(container_class in open_classes for open_classes in self._open_classes)):
+                if attrs.get("title"):
+                    self._usernames[index] = attrs["title"]
+                elif tag not in self.VOID_TAGS:
+                    self._capturing.append((index, len(self._open_classes), []))
+
+        if tag not in self.VOID_TAGS:
+            self._open_classes.append(classes)
 
-        # Locate percentage change
-        percentage_change = float(WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, '.PortfolioProfitInfo_percentText__3NKUK'))
-        ).get_attribute("title").strip("%"))
+    def handle_endtag(self, tag):
+        if tag in self.VOID_TAGS or not self._open_classes:
+            return
+        self._open_classes.pop()
+        depth = len(self._open_classes)
+        while self._capturing and self._capturing[-1][1] >= depth:
+            index, _, parts = self._capturing.pop()
+            text = "".join(parts).strip()
+            if text and self._usernames[index] is None:
+                self._usernames[index] = text
 
-        # Locate money changed in 24 hours
-        money_changed = float(WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, '.PortfolioProfitInfo_PTProfitInfoPrice__79_kR'))
-        ).get_attribute("title").replace("$", "").replace(",", "").strip())
+    def handle_data(self, data):
+        for _, _, parts in self._capturing:
+            parts.append(data)
 
-        return username, total_value, percentage_change, money_changed
+    def close(self):
+        super().close()
+        self.values["username"] = next((username for username in self._usernames if username), None)
+        return self.values
 
+def parse_portfolio_html(html):
+    """Return the raw portfolio values found in a CoinStats page, None for anything missing."""
+    parser = PortfolioPageParser()
+    parser.feed(html)
+    return parser.close()
+
+def get_portfolio_data_http(portfolio_url):
+    """Fetch the portfolio page over plain HTTP and read the values from its server-rendered HTML."""
+    try:
+        response = http_client.get(
+            portfolio_url, headers={"User-Agent": BROWSER_USER_AGENT}, breaker=source_breaker("http", portfolio_url),
+        )
+        response.raise_for_status()
+        with metrics.span("portfolio_parse", backend="http"):
+            values = parse_portfolio_html(response.text)
+        if not all(values[key] for key in ("total_value", "percentage_change", "money_changed")):
+            logging.info(f"Portfolio values not in the HTML of {portfolio_url}")
+            return None, None, None, None
+        return parse_portfolio_values(values)
     except Exception as e:
-        logging.error(f"ERROR: Failed to fetch portfolio data: {e}")
+        logging.warning(f"HTTP portfolio fetch failed: {e}")
         return None, None, None, None
 
-    finally:
-        driver.quit()
+# Scraping backends, tried in PORTFOLIO_BACKENDS order until one returns data
+PORTFOLIO_BACKENDS = {
+    "http": get_portfolio_data_http,
+    "selenium": get_portfolio_data_selenium,
+}
+PORTFOLIO_BACKEND_ORDER = [name.strip() for name in os.getenv("PORTFOLIO_BACKENDS", "http,selenium").split(",")]
 
-def monitor_portfolios():
-    """Monitor portfolios and send updates or alerts."""
-    # Load portfolios from the JSON file
-    portfolios = load_portfolios()
+def get_portfolio_data(portfolio_url):
+    """Fetch portfolio data with the first backend that succeeds."""
+    for backend_name in PORTFOLIO_BACKEND_ORDER:
+        with metrics.span("portfolio_scrape", backend=backend_name):
+            username, total_value, percentage_change, money_changed = PORTFOLIO_BACKENDS[backend_name](portfolio_url)
+        if total_value is not None:
+            return username, total_value, percentage_change, money_changed
+        metrics.increment("portfolio_scrape_empty", backend=backend_name)
+        logging.info(f"{backend_name} backend returned no data for {portfolio_url}")
+    return None, None, None, None
 
-    # Dictionary to store previous values and total gain/loss for each portfolio
-    previous_values = {portfolio["name"]: None for portfolio in portfolios}
-    total_gain_loss = {portfolio["name"]: 0 for portfolio in portfolios}
+class PortfolioTracker:
+    """Previous value and total gain/loss per portfolio, shared by the scraping workers.
 
-    while True:
-        for portfolio in portfolios:
+    With a history store, every sample is recorded and a portfolio's last value and
+    running total are restored from it when tracking starts, so they survive restarts.
+    In delta mode it also keeps the value each portfolio's last update was sent with.
+    """
+
+    def __init__(self, portfolios, history=None):
+        self._lock = threading.Lock()
+        self.history = history
+        self.previous_values = {}
+        self.total_gain_loss = {}
+        self.last_sent = {}
+        self.digest_clock = DigestClock()
+        self.sync(portfolios)
+
+    def record(self, portfolio_name, total_value):
+        """Store a new value and return (value_difference, total_gain_loss).
+
+        value_difference is None the first time a portfolio is recorded.
+        """
+        with self._lock:
+            previous_value = self.previous_values.get(portfolio_name)
+            value_difference = None
+            if previous_value is not None:
+                value_difference = total_value - previous_value
+                self.total_gain_loss[portfolio_name] = self.total_gain_loss.get(portfolio_name, 0) + value_difference
+
+            # Update the previous value for the next iteration
+            self.previous_values[portfolio_name] = total_value
+            total_gain_loss = self.total_gain_loss.get(portfolio_name, 0)
+
+        if self.history is not None:
+            try:
+                self.history.append_many({
+                    f"portfolio:{portfolio_name}:value": total_value,
+                    f"portfolio:{portfolio_name}:total_gain_loss": total_gain_loss,
+                })
+            except Exception as e:
+                logging.error(f"ERROR: Failed to record portfolio history: {e}")
+        return value_difference, total_gain_loss
+
+    def update_due(self, portfolio_name, total_value):
+        """Return (due, last_sent_value) and, when due, record total_value as sent.
+
+        Outside delta mode every update is due. In delta mode an update is due when
+        the value moved significantly since the last one sent, or a full digest is due.
+        """
+        if not delta_mode():
+            return True, None
+        with self._lock:
+            last_sent = self.last_sent.get(portfolio_name)
+            due = self.digest_clock.due(portfolio_name) or is_significant(last_sent, total_value)
+            if due:
+                self.last_sent[portfolio_name] = total_value
+        if due:
+            self.digest_clock.mark(portfolio_name)
+        return due, last_sent
+
+    def _restore(self, portfolio):
+        """Last recorded (value, total gain/loss) of a portfolio, falling back to its config."""
+        portfolio_name = portfolio["name"]
+        previous_value, total_gain_loss = None, None
+        if self.history is not None:
             try:
-                # Extract portfolio details
-                portfolio_url = portfolio["url"]
-                threshold = portfolio["threshold"]
-                portfolio_name = portfolio["name"]
-
-                # Fetch portfolio data using Selenium
-                username, total_value, percentage_change, money_changed = get_portfolio_data_selenium(portfolio_url)
-
-                if total_value is not None and percentage_change is not None:
-                    current_time = datetime.now().strftime('%H:%M')
-
-                    # Calculate the difference from the previous value
-                    previous_value = previous_values.get(portfolio_name)
-                    if previous_value is not None:
-                        value_difference = total_value - previous_value
-                        total_gain_loss[portfolio_name] += value_difference
-                        difference_text = f" ({'+' if value_difference > 0 else ''}{value_difference:.2f})"
-                    else:
-                        difference_text = ""  # No difference for the first iteration
-
-                    # Update the previous value for the next iteration
-                    previous_values[portfolio_name] = total_value
-
-                    change_emoji = "📈" if money_changed > 0 else "📉"
-
-                    # Portfolio update message
-                    update_message = (
-                        f"📊 <b>{username} Update</b>\n"
+                previous_value = self.history.last(f"portfolio:{portfolio_name}:value")
+                total_gain_loss = self.history.last(f"portfolio:{portfolio_name}:total_gain_loss")
+            except Exception as e:
+                logging.error(f"ERROR: Failed to restore portfolio history: {e}")
+        if total_gain_loss is None:
+            total_gain_loss = portfolio.get("totalLostOrGainedSinceTheStartOfTheScript", 0)
+        return previous_value, total_gain_loss
+
+    def sync(self, portfolios):
+        """Start tracking new portfolios and forget removed ones; returns (added, removed) names."""
+        by_name = {portfolio["name"]: portfolio for portfolio in portfolios}
+        with self._lock:
+            added = by_name.keys() - self.previous_values.keys()
+            removed = self.previous_values.keys() - by_name.keys()
+        restored = {portfolio_name: self._restore(by_name[portfolio_name]) for portfolio_name in added}
+
+        with self._lock:
+            for portfolio_name, (previous_value, total_gain_loss) in restored.items():
+                self.previous_values[portfolio_name] = previous_value
+                self.total_gain_loss[portfolio_name] = total_gain_loss
+            for portfolio_name in removed:
+                del self.previous_values[portfolio_name]
+                del self.total_gain_loss[portfolio_name]
+                self.last_sent.pop(portfolio_name, None)
+                self.digest_clock.forget(portfolio_name)
+        return added, removed
+
+def process_portfolio(portfolio, tracker, chat_ids=(None,)):
+    """Scrape one portfolio and send its update, plus any alerts it triggers, to each chat."""
+    try:
+        # Extract portfolio details
+        portfolio_url = portfolio["url"]
+        threshold = portfolio.get("threshold")
+        portfolio_name = portfolio["name"]
+
+        # Fetch portfolio data (plain HTTP first, Selenium as fallback)
+        username, total_value, percentage_change, money_changed = get_portfolio_data(portfolio_url)
+
+        if total_value is not None and percentage_change is not None:
+            current_time = datetime.now().strftime('%H:%M')
+
+            # Calculate the difference from the previous value
+            value_difference, total_gain_loss = tracker.record(portfolio_name, total_value)
+            update_due, last_sent = tracker.update_due(portfolio_name, total_value)
+            if last_sent is not None:
+                value_difference = total_value - last_sent  # Delta mode: against the last update sent
+            if value_difference is not None:
+                difference_text = f" ({'+' if value_difference > 0 else ''}{value_difference:.2f})"
+            else:
+                difference_text = ""  # No difference for the first iteration
+
+            change_emoji = "📈" if money_changed > 0 else "📉"
+
+            # Portfolio update message
+            update_message = (
+                f"📊 <b>{username} Update</b>\n"
+                f"🔗 <b>Portfolio Link:</b> {portfolio_url}\n\n"
+                f"💰 Current Value: ${total_value:.2f}{difference_text}\n"
+                f"{change_emoji} 24h Change: {percentage_change}%\n"
+                f"💵 Money Changed: ${money_changed:.2f}\n"
+                f"📊 Total Lost/Gained: ${total_gain_loss:.2f}\n\n"
+                f"🕒 Sent at: {current_time}"
+            )
+
+            if update_due:
+                for chat_id in chat_ids:
+                    send_telegram_message(update_message, chat_id, coalesce=True)  # Merged with other due updates
+            else:
+                logging.info(f"No significant change for {portfolio_name}, skipping update")
+                metrics.increment("portfolio_updates_skipped")
+
+            # Alerts fire once per crossing, not on every update above the threshold
+            for rule in alert_engine.evaluate(f"portfolio:{portfolio_name}:value", total_value):
+                if rule.rule_id == portfolio_rule_id(portfolio_name):
+                    alert_message = (
+                        f"🚀 <b>{username} Alert</b>\n"
                         f"🔗 <b>Portfolio Link:</b> {portfolio_url}\n\n"
-                        f"💰 Current Value: ${total_value:.2f}{difference_text}\n"
-                        f"{change_emoji} 24h Change: {percentage_change}%\n"
-                        f"💵 Money Changed: ${money_changed:.2f}\n"
-                        f"📊 Total Lost/Gained: ${total_gain_loss[portfolio_name]:.2f}\n\n"
+                        f"💰 Current Value: ${total_value:.2f}\n"
+                        f"⚠️ Threshold of ${threshold} crossed!\n"
                         f"🕒 Sent at: {current_time}"
                     )
+                    repeats = 3  # Send alert multiple times, spaced out by the queue's rate limit
+                else:
+                    alert_message = (
+                        f"🚨 <b>{username} Alert</b>\n"
+                        f"🔗 <b>Portfolio Link:</b> {portfolio_url}\n\n"
+                        f"⚠️ {rule.describe(total_value)}\n"
+                        f"🕒 Sent at: {current_time}"
+                    )
+                    repeats = 1
+                for chat_id in alert_chats(rule, chat_ids):
+                    for _ in range(repeats):
+                        send_telegram_message(alert_message, chat_id)
+
+    except Exception as e:
+        logging.error(f"ERROR: {e}")
+
+class PortfolioMonitor:
+    """Runs portfolio update cycles; config provides portfolios(), tickers() and subscriptions().
+
+    Portfolios added to or removed from config are picked up on the next cycle.
+    """
+
+    def __init__(self, config=config):
+        self.config = config
+
+        # Previous values and total gain/loss for each portfolio, persisted in the history store
+        self.tracker = PortfolioTracker([], history=default_store())
+
+        # Scrapes still running from an earlier cycle, by portfolio name
+        self.in_flight = {}
 
-                    send_telegram_message(update_message)
-
-                    # Send alert if the threshold is crossed
-                    if total_value >= threshold:
-                        alert_message = (
-                            f"🚀 <b>{username} Alert</b>\n"
-                            f"🔗 <b>Portfolio Link:</b> {portfolio_url}\n\n"
-                            f"💰 Current Value: ${total_value:.2f}\n"
-                            f"⚠️ Threshold of ${threshold} crossed!\n"
-                            f"🕒 Sent at: {current_time}"
-                        )
-                        for _ in range(3):  # Send alert multiple times
-                            send_telegram_message(alert_message)
-                            time.sleep(1)
+        # Cycle interval tuned by how much the portfolio values move, used when ADAPTIVE_POLLING is on
+        self.polling = AdaptivePolling(PORTFOLIO_UPDATE_INTERVAL)
+        self.executor = ThreadPoolExecutor(max_workers=PORTFOLIO_CONCURRENCY, thread_name_prefix="Portfolio")
 
+        # Resolve the chromedriver binary once before the first scrape. Only Selenium needs it, and
+        # if it cannot be resolved now the Selenium backend retries on use while HTTP keeps working
+        if "selenium" in PORTFOLIO_BACKEND_ORDER:
+            try:
+                browser_pool.start()
             except Exception as e:
-                logging.error(f"ERROR: {e}")
+                logging.error(f"ERROR: Could not resolve chromedriver, Selenium scrapes will fail until it can: {e}")
+
+    def run_cycle(self):
+        """Scrape every portfolio and send its update; returns once the cycle is done or timed out."""
+        # Only portfolios some chat follows are scraped, each one once per cycle
+        followers = chats_by_portfolio(chat_subscriptions(self.config))
+        portfolios = [portfolio for portfolio in self.config.portfolios() if portfolio["name"] in followers]
+        added, removed = self.tracker.sync(portfolios)
+        alert_engine.set_rules(build_rules(self.config))
+        if added or removed:
+            logging.info(f"Monitoring portfolios: added {sorted(added)}, removed {sorted(removed)}")
+        for portfolio_name in removed:
+            self.in_flight.pop(portfolio_name, None)
+
+        # Each worker reports its own portfolio as soon as it is scraped,
+        # so a slow portfolio never holds back the others
+        futures = {}
+        for portfolio in portfolios:
+            portfolio_name = portfolio["name"]
+            if portfolio_name in self.in_flight and not self.in_flight[portfolio_name].done():
+                logging.warning(f"Skipping {portfolio_name}: previous scrape still running")
+                metrics.increment("portfolio_scrape_skipped")
+                continue
+            futures[portfolio_name] = self.executor.submit(
+                process_portfolio, portfolio, self.tracker, followers[portfolio_name],
+            )
+        self.in_flight.update(futures)
 
-        # Timer for the next portfolio update (10-minute interval with 10-second increments)
-        for remaining in range(600, 0, -10):
-            minutes, seconds = divmod(remaining, 60)
-            logging.info(f"Next portfolio update in: {minutes:02d}:{seconds:02d}")
-            time.sleep(10)
+        # Wait for this cycle's scrapes, but no longer than their timeouts allow
+        batches = math.ceil(len(futures) / PORTFOLIO_CONCURRENCY)
+        _, not_done = wait(futures.values(), timeout=PORTFOLIO_SCRAPE_TIMEOUT * batches)
+        for portfolio_name, future in futures.items():
+            if future in not_done:
+                logging.warning(f"{portfolio_name} did not finish within {PORTFOLIO_SCRAPE_TIMEOUT}s")
+                metrics.increment("portfolio_cycle_timeouts")
+
+        rate_limited = any(source_breaker("http", portfolio["url"]).rate_limited for portfolio in portfolios)
+        values = {portfolio_name: value for portfolio_name, value in self.tracker.previous_values.copy().items()
+                  if portfolio_name in futures}
+        self.polling.observe(values, rate_limited=rate_limited)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def monitor_portfolios(config=config):
+    """Monitor portfolios and send updates or alerts."""
+    monitor = PortfolioMonitor(config)
+    metrics.start_metrics_server()
+    run_forever(
+        "Portfolio update", monitor.run_cycle, PORTFOLIO_UPDATE_INTERVAL,
+        interval_func=monitor.polling.interval if ADAPTIVE_POLLING else None,
+    )
 
 
 if __name__ == "__main__":
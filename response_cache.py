@@ -0,0 +1,133 @@
+import json
+import logging
+import threading
+import time
+
+from json_files import read_json_file, write_json_atomic
+
+
+def cache_key(url, params=None):
+    """Cache key for a request: the URL plus its params in a stable order."""
+    return json.dumps([url, sorted((params or {}).items())], default=str)
+
+
+class ResponseCache:
+    """TTL cache for parsed JSON responses, shared by every caller in the process.
+
+    A fresh entry (younger than ttl) is returned as is. A stale one (younger than
+    ttl + stale_ttl) is returned immediately while a background thread refreshes
+    it. Concurrent misses on the same key share one upstream call. Entries older
+    than ttl + stale_ttl are evicted whenever a new entry is stored. With a path,
+    entries are also kept on disk so a restart starts warm.
+
+    Values that are not plain JSON can be cached with a codec, an (encode, decode)
+    pair. They stay as objects in memory and are only encoded when written to disk,
+    and decoded once when first read after a restart.
+
+    Cached values are shared and must not be modified by callers.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = read_json_file(path, {}) if path else {}  # {key: [stored_at, value, expires_at]}
+        self._raw = set(self._entries)  # Keys whose value is still as loaded from disk
+        self._encoders = {}  # {key: encode} for values stored with a codec
+        self._key_locks = {}
+        self._refreshing = set()
+        self.hits = 0
+        self.misses = 0
+        self._evict_expired(time.time())
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _evict_expired(self, now):
+        """Drop entries that can no longer be served; call with _lock held."""
+        for key in [key for key, entry in self._entries.items() if len(entry) < 3 or entry[2] <= now]:
+            del self._entries[key]
+            self._raw.discard(key)
+            self._encoders.pop(key, None)
+            if key not in self._refreshing:
+                self._key_locks.pop(key, None)
+
+    def _store(self, key, value, lifetime, codec=None):
+        now = time.time()
+        with self._lock:
+            self._entries[key] = [now, value, now + lifetime]
+            self._raw.discard(key)
+            if codec is not None:
+                self._encoders[key] = codec[0]
+            self._evict_expired(now)
+            snapshot = dict(self._entries) if self.path else None
+            encoders = dict(self._encoders)
+        if snapshot is not None:
+            try:
+                write_json_atomic(self.path, {
+                    key: [stored_at, encoders[key](value) if key in encoders else value, expires_at]
+                    for key, (stored_at, value, expires_at) in snapshot.items()
+                })
+            except Exception as e:
+                logging.warning(f"Failed to write response cache {self.path}: {e}")
+
+    def _age(self, key, codec=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and codec is not None and key in self._raw:
+                entry[1] = codec[1](entry[1])  # First read of an entry loaded from disk
+                self._raw.discard(key)
+                self._encoders[key] = codec[0]
+        if entry is None:
+            return None, None
+        return time.time() - entry[0], entry[1]
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _refresh_in_background(self, key, fetch, lifetime, codec=None):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._store(key, fetch(), lifetime, codec)
+            except Exception as e:
+                logging.warning(f"Background refresh failed, keeping stale entry: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="CacheRefresh", daemon=True).start()
+
+    def get_or_fetch(self, key, fetch, ttl, stale_ttl=0, codec=None):
+        """Return the cached value for key, calling fetch() when it is missing or too old."""
+        age, value = self._age(key, codec)
+        if age is not None and age < ttl:
+            self._count(hit=True)
+            return value
+        if age is not None and age < ttl + stale_ttl:
+            self._count(hit=True)
+            self._refresh_in_background(key, fetch, ttl + stale_ttl, codec)
+            return value
+
+        # Only one caller fetches a missing key; the others wait and reuse its result
+        with self._key_lock(key):
+            age, value = self._age(key, codec)
+            if age is not None and age < ttl:
+                self._count(hit=True)
+                return value
+            self._count(hit=False)
+            value = fetch()
+            self._store(key, value, ttl + stale_ttl, codec)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
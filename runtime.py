@@ -0,0 +1,60 @@
+import asyncio
+import logging
+
+import market_manager
+import metrics
+import portfolio_manager
+from circuit_breaker import ADAPTIVE_POLLING
+from main import build_application, store
+from scheduler import Scheduler
+
+# Runs the Telegram bot and both monitors in one process, on the bot's event loop.
+# The monitors read tickers and portfolios straight from the bot's StateStore, so
+# chat edits reach them without a round trip through the JSON files, and every
+# component shares the same HTTP client and browser pool.
+
+
+async def start_monitors(application):
+    """Schedule the market and portfolio monitors once the bot is initialised."""
+    market_manager.restore_previous_values()
+    metrics.start_metrics_server()
+    scheduler = Scheduler()
+    scheduler.add_job(
+        "market", lambda: market_manager.run_market_update(store),
+        market_manager.MARKET_UPDATE_INTERVAL, run_immediately=True,
+        interval_func=market_manager.market_polling.interval if ADAPTIVE_POLLING else None,
+    )
+
+    # Building the monitor may download chromedriver, so keep it off the event loop, and
+    # never let a portfolio monitor that cannot start take the bot down with it
+    try:
+        portfolio_monitor = await asyncio.to_thread(portfolio_manager.PortfolioMonitor, store)
+    except Exception as e:
+        logging.error(f"ERROR: Portfolio monitor failed to start, running without portfolio updates: {e}")
+    else:
+        scheduler.add_job(
+            "portfolios", portfolio_monitor.run_cycle,
+            portfolio_manager.PORTFOLIO_UPDATE_INTERVAL, run_immediately=True,
+            interval_func=portfolio_monitor.polling.interval if ADAPTIVE_POLLING else None,
+        )
+        application.bot_data["portfolio_monitor"] = portfolio_monitor
+
+    # The /refresh and /schedule bot commands reach the scheduler through bot_data
+    application.bot_data["scheduler"] = scheduler
+    application.bot_data["monitor_tasks"] = [asyncio.create_task(scheduler.run())]
+
+
+def run():
+    """Run the bot and both monitors until interrupted."""
+    application = build_application(post_init=start_monitors)
+    try:
+        application.run_polling()
+    finally:
+        for task in application.bot_data.get("monitor_tasks", []):
+            task.cancel()
+        if "portfolio_monitor" in application.bot_data:
+            application.bot_data["portfolio_monitor"].close()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,150 @@
+import asyncio
+import inspect
+import logging
+import math
+import time
+from datetime import datetime
+
+import metrics
+
+
+def next_aligned_run(interval, now, offset=0):
+    """Next wall-clock time after now that falls on the interval grid (e.g. every :00/:30 for 1800 s)."""
+    return (math.floor((now - offset) / interval) + 1) * interval + offset
+
+
+class Job:
+    """A function run by the Scheduler at fixed wall-clock intervals.
+
+    With interval_func, the interval is read from it after every run, so the
+    job can poll faster or slower depending on what it saw.
+    """
+
+    def __init__(self, name, func, interval, offset=0, run_immediately=False, interval_func=None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.interval_func = interval_func
+        self.offset = offset
+        self.run_immediately = run_immediately
+        self.next_run = None
+        self.last_run = None
+        self.last_duration = None
+        self.runs = 0
+        self.skipped = 0
+        self._wake = asyncio.Event()
+        self._loop = None
+
+    def trigger(self):
+        """Run the job as soon as possible; safe to call from any thread."""
+        if self._loop is None:
+            return False
+        self._loop.call_soon_threadsafe(self._wake.set)
+        return True
+
+    def status(self):
+        return {
+            "name": self.name,
+            "interval": self.interval,
+            "next_run": self.next_run,
+            "last_run": self.last_run,
+            "last_duration": self.last_duration,
+            "runs": self.runs,
+            "skipped": self.skipped,
+        }
+
+    def describe(self):
+        """One-line human readable status."""
+        next_run = datetime.fromtimestamp(self.next_run).strftime('%H:%M:%S') if self.next_run else "-"
+        last_duration = f"{self.last_duration:.1f}s" if self.last_duration is not None else "-"
+        return f"{self.name}: next run {next_run}, last took {last_duration}, {self.runs} runs, {self.skipped} skipped"
+
+    async def _call(self):
+        with metrics.cycle_profile(self.name):
+            if inspect.iscoroutinefunction(self.func):
+                await self.func()
+            else:
+                await asyncio.to_thread(self.func)
+
+    async def run_forever(self):
+        self._loop = asyncio.get_running_loop()
+        now = time.time()
+        self.next_run = now if self.run_immediately else next_aligned_run(self.interval, now, self.offset)
+
+        while True:
+            # Sleep until the next slot, or until someone triggers the job
+            triggered = False
+            delay = self.next_run - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                    triggered = True
+                except asyncio.TimeoutError:
+                    pass
+            self._wake.clear()
+
+            self.last_run = time.time()
+            try:
+                await self._call()
+            except Exception as e:
+                logging.error(f"ERROR: {self.name} failed: {e}")
+            now = time.time()
+            self.last_duration = now - self.last_run
+            self.runs += 1
+
+            if self.interval_func is not None:
+                interval = self.interval_func()
+                if interval != self.interval:
+                    logging.info(f"{self.name} interval changed from {self.interval:.0f}s to {interval:.0f}s")
+                    self.interval = interval
+                # Adaptive intervals are off the wall-clock grid: the next run is one interval after this one
+                self.next_run = self.last_run + self.interval
+                if self.next_run <= now:
+                    self.skipped += 1
+                    logging.warning(f"{self.name} overran its {self.interval:.0f}s interval")
+                    self.next_run = now + self.interval
+
+            # Coalesce overruns: slots that passed while the job was running are skipped, not queued
+            elif self.next_run <= now:
+                missed = math.floor((now - self.next_run) / self.interval) + (1 if triggered else 0)
+                if missed:
+                    self.skipped += missed
+                    logging.warning(f"{self.name} overran, skipping {missed} slot(s)")
+                self.next_run = next_aligned_run(self.interval, now, self.offset)
+
+            logging.info(self.describe())
+
+
+class Scheduler:
+    """Runs jobs at fixed wall-clock intervals on an asyncio loop, without drift.
+
+    Blocking job functions run in a worker thread. A job that overruns its slot
+    skips the slots it missed instead of running them back to back, and any job
+    can be triggered early with trigger().
+    """
+
+    def __init__(self):
+        self.jobs = {}
+
+    def add_job(self, name, func, interval, offset=0, run_immediately=False, interval_func=None):
+        job = Job(name, func, interval, offset, run_immediately, interval_func)
+        self.jobs[name] = job
+        return job
+
+    def trigger(self, name=None):
+        """Trigger one job by name, or every job; returns the names that were triggered."""
+        jobs = self.jobs.values() if name is None else [self.jobs[name]] if name in self.jobs else []
+        return [job.name for job in jobs if job.trigger()]
+
+    def status(self):
+        return [job.status() for job in self.jobs.values()]
+
+    async def run(self):
+        await asyncio.gather(*(job.run_forever() for job in self.jobs.values()))
+
+
+def run_forever(name, func, interval, offset=0, interval_func=None):
+    """Run a single job in its own event loop; used by the standalone monitor scripts."""
+    scheduler = Scheduler()
+    scheduler.add_job(name, func, interval, offset, run_immediately=True, interval_func=interval_func)
+    asyncio.run(scheduler.run())
@@ -0,0 +1,223 @@
+import copy
+import logging
+import os
+import threading
+
+from json_files import read_json_file, write_json_atomic
+
+
+class StateStore:
+    """In-process copy of portfolios.json, tickers.json and subscriptions.json.
+
+    Both files are loaded once and reads are served from memory. A change marks
+    only its own file dirty, and dirty files are written atomically after
+    save_delay seconds, so a burst of edits costs one write per file.
+    """
+
+    def __init__(self, portfolios_path="portfolios.json", tickers_path="tickers.json",
+                 subscriptions_path="subscriptions.json", alerts_path="alerts.json", save_delay=1.0):
+        self.paths = {"portfolios": portfolios_path, "tickers": tickers_path, "subscriptions": subscriptions_path}
+        self.save_delay = save_delay
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()  # Keeps snapshots and their writes in order
+        self._data = {
+            "portfolios": read_json_file(portfolios_path, []),
+            "tickers": read_json_file(tickers_path, []),
+            "subscriptions": read_json_file(subscriptions_path, {}),  # {chat_id: {"tickers", "portfolios"}}
+        }
+        self._dirty = set()
+        self._save_timer = None
+        self._alerts = WatchedJsonFile(alerts_path, [])  # Hand-edited, so watched rather than cached
+
+    def portfolios(self):
+        with self._lock:
+            return [dict(portfolio) for portfolio in self._data["portfolios"]]
+
+    def tickers(self):
+        with self._lock:
+            return list(self._data["tickers"])
+
+    def alerts(self):
+        return self._alerts.get()
+
+    def add_portfolio(self, portfolio):
+        """Add a portfolio; returns False if one with the same name already exists.
+
+        Portfolios are identified by name in subscriptions, alert rules and the
+        tracker, so names must stay unique across chats.
+        """
+        with self._lock:
+            if any(existing["name"] == portfolio["name"] for existing in self._data["portfolios"]):
+                return False
+            self._data["portfolios"].append(dict(portfolio))
+            self._mark_dirty("portfolios")
+            return True
+
+    def add_ticker(self, ticker):
+        """Add a ticker; returns False if it was already there."""
+        with self._lock:
+            if ticker in self._data["tickers"]:
+                return False
+            self._data["tickers"].append(ticker)
+            self._mark_dirty("tickers")
+            return True
+
+    def remove_ticker(self, ticker):
+        """Remove a ticker; returns False if it was not there."""
+        with self._lock:
+            if ticker not in self._data["tickers"]:
+                return False
+            self._data["tickers"].remove(ticker)
+            self._mark_dirty("tickers")
+            return True
+
+    def subscriptions(self):
+        with self._lock:
+            return copy.deepcopy(self._data["subscriptions"])
+
+    def is_subscribed(self, chat_id):
+        with self._lock:
+            return str(chat_id) in self._data["subscriptions"]
+
+    def subscribe(self, chat_id):
+        """Give a chat its own ticker and portfolio lists; returns False if it already has them."""
+        with self._lock:
+            if str(chat_id) in self._data["subscriptions"]:
+                return False
+            self._data["subscriptions"][str(chat_id)] = {"tickers": [], "portfolios": []}
+            self._mark_dirty("subscriptions")
+            return True
+
+    def unsubscribe(self, chat_id):
+        """Drop a chat's subscription, and the portfolios it added that no other chat follows."""
+        with self._lock:
+            if self._data["subscriptions"].pop(str(chat_id), None) is None:
+                return False
+            self._mark_dirty("subscriptions")
+
+            followed = {name for subscription in self._data["subscriptions"].values()
+                        for name in subscription.get("portfolios", [])}
+            portfolios = [portfolio for portfolio in self._data["portfolios"]
+                          if portfolio.get("owner") != str(chat_id) or portfolio["name"] in followed]
+            if len(portfolios) != len(self._data["portfolios"]):
+                self._data["portfolios"] = portfolios
+                self._mark_dirty("portfolios")
+            return True
+
+    def _update_subscription_list(self, chat_id, key, item, add):
+        with self._lock:
+            items = self._data["subscriptions"][str(chat_id)][key]
+            if (item in items) == add:
+                return False
+            items.append(item) if add else items.remove(item)
+            self._mark_dirty("subscriptions")
+            return True
+
+    def add_chat_ticker(self, chat_id, ticker):
+        """Add a ticker to a subscribed chat; returns False if it was already there."""
+        return self._update_subscription_list(chat_id, "tickers", ticker, add=True)
+
+    def remove_chat_ticker(self, chat_id, ticker):
+        """Remove a ticker from a subscribed chat; returns False if it was not there."""
+        return self._update_subscription_list(chat_id, "tickers", ticker, add=False)
+
+    def add_chat_portfolio(self, chat_id, portfolio_name):
+        """Follow a portfolio from a subscribed chat; returns False if it already did."""
+        return self._update_subscription_list(chat_id, "portfolios", portfolio_name, add=True)
+
+    def set_chat_template(self, chat_id, template):
+        """Pick the market update template of a subscribed chat; returns False if it is not subscribed."""
+        with self._lock:
+            subscription = self._data["subscriptions"].get(str(chat_id))
+            if subscription is None:
+                return False
+            subscription["template"] = template
+            self._mark_dirty("subscriptions")
+            return True
+
+    def _mark_dirty(self, name):
+        self._dirty.add(name)
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Write every dirty file now."""
+        with self._write_lock:
+            with self._lock:
+                self._save_timer = None
+                pending = {name: copy.deepcopy(self._data[name]) for name in self._dirty}
+                self._dirty.clear()
+
+            for name, data in pending.items():
+                try:
+                    write_json_atomic(self.paths[name], data)
+                except Exception as e:
+                    logging.error(f"ERROR: Failed to save {self.paths[name]}: {e}")
+                    with self._lock:
+                        self._mark_dirty(name)  # Try again on the next save
+
+    def close(self):
+        """Cancel the pending save and write everything that is dirty."""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+        self.flush()
+
+
+class WatchedJsonFile:
+    """A JSON file that is re-parsed only when its mtime or size changes.
+
+    The returned data is shared between callers and must not be modified.
+    """
+
+    def __init__(self, path, default):
+        self.path = path
+        self.default = default
+        self._lock = threading.Lock()
+        self._signature = None
+        self._data = default
+
+    def _stat_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self):
+        signature = self._stat_signature()
+        with self._lock:
+            if signature != self._signature:
+                self._data = read_json_file(self.path, self.default) if signature else self.default
+                self._signature = signature
+                logging.info(f"Loaded {self.path}")
+            return self._data
+
+
+class ConfigWatcher:
+    """Up-to-date, read-only view of portfolios.json, tickers.json and subscriptions.json for the monitors.
+
+    Offers the same tickers()/portfolios()/subscriptions()/alerts() reads as StateStore,
+    so the monitors can run against either.
+    """
+
+    def __init__(self, portfolios_path="portfolios.json", tickers_path="tickers.json",
+                 subscriptions_path="subscriptions.json", alerts_path="alerts.json"):
+        self._portfolios = WatchedJsonFile(portfolios_path, [])
+        self._tickers = WatchedJsonFile(tickers_path, [])
+        self._subscriptions = WatchedJsonFile(subscriptions_path, {})
+        self._alerts = WatchedJsonFile(alerts_path, [])
+
+    def portfolios(self):
+        return self._portfolios.get()
+
+    def tickers(self):
+        return self._tickers.get()
+
+    def subscriptions(self):
+        return self._subscriptions.get()
+
+    def alerts(self):
+        return self._alerts.get()
@@ -0,0 +1,38 @@
+from notifier import CHAT_ID
+
+# Every chat that receives updates follows its own tickers and portfolios. Chats
+# subscribe through the bot (subscriptions.json); the CHAT_ID chat from the
+# environment keeps following tickers.json and every portfolio without an "owner",
+# i.e. every portfolio that was not added from a subscribed chat.
+
+
+def chat_subscriptions(config):
+    """What each chat follows: {chat_id: {"tickers": [...], "portfolios": [...], "template": name or None}}."""
+    chats = {}
+    if CHAT_ID:
+        chats[str(CHAT_ID)] = {
+            "tickers": list(config.tickers()),
+            "portfolios": [portfolio["name"] for portfolio in config.portfolios() if not portfolio.get("owner")],
+            "template": None,
+        }
+    for chat_id, subscription in config.subscriptions().items():
+        chats[str(chat_id)] = {
+            "tickers": list(subscription.get("tickers", [])),
+            "portfolios": list(subscription.get("portfolios", [])),
+            "template": subscription.get("template"),
+        }
+    return chats
+
+
+def all_tickers(chats):
+    """Every ticker any chat follows, once each, in first-seen order."""
+    return list(dict.fromkeys(ticker for subscription in chats.values() for ticker in subscription["tickers"]))
+
+
+def chats_by_portfolio(chats):
+    """Chats following each portfolio: {portfolio_name: [chat_id, ...]}."""
+    followers = {}
+    for chat_id, subscription in chats.items():
+        for portfolio_name in subscription["portfolios"]:
+            followers.setdefault(portfolio_name, []).append(chat_id)
+    return followers
@@ -0,0 +1,70 @@
+from alert_engine import AlertEngine, AlertRule
+
+
+def make_engine(*rules):
+    engine = AlertEngine()
+    engine.set_rules(list(rules))
+    return engine
+
+
+def fired(engine, value, now, target="price:BTC"):
+    return [rule.rule_id for rule in engine.evaluate(target, value, now=now)]
+
+
+def test_fires_once_on_a_crossing():
+    engine = make_engine(AlertRule("btc", "price:BTC", "above", 100, hysteresis=5, cooldown=0))
+    assert fired(engine, 90, now=0) == []
+    assert fired(engine, 101, now=1) == ["btc"]
+    # Staying above the threshold does not fire again
+    assert fired(engine, 110, now=2) == []
+    assert fired(engine, 100, now=3) == []
+
+
+def test_rearms_only_past_the_hysteresis():
+    engine = make_engine(AlertRule("btc", "price:BTC", "above", 100, hysteresis=5, cooldown=0))
+    assert fired(engine, 101, now=0) == ["btc"]
+    # Dipping below the threshold but not past the hysteresis keeps the rule disarmed
+    assert fired(engine, 97, now=1) == []
+    assert fired(engine, 102, now=2) == []
+    assert fired(engine, 94, now=3) == []
+    assert fired(engine, 102, now=4) == ["btc"]
+
+
+def test_below_rearms_above_the_hysteresis():
+    engine = make_engine(AlertRule("btc", "price:BTC", "below", 100, hysteresis=5, cooldown=0))
+    assert fired(engine, 99, now=0) == ["btc"]
+    assert fired(engine, 104, now=1) == []
+    assert fired(engine, 99, now=2) == []
+    assert fired(engine, 106, now=3) == []
+    assert fired(engine, 99, now=4) == ["btc"]
+
+
+def test_crossing_in_the_cooldown_disarms_the_rule():
+    engine = make_engine(AlertRule("btc", "price:BTC", "above", 100, hysteresis=5, cooldown=60))
+    assert fired(engine, 101, now=0) == ["btc"]
+    assert fired(engine, 90, now=10) == []
+    # Held back by the cooldown, and it does not fire later for the same crossing
+    assert fired(engine, 101, now=20) == []
+    assert fired(engine, 105, now=100) == []
+    # A new crossing after the cooldown fires again
+    assert fired(engine, 90, now=110) == []
+    assert fired(engine, 101, now=120) == ["btc"]
+
+
+def test_percent_move_measures_from_its_reference():
+    engine = make_engine(AlertRule("btc", "price:BTC", "percent_move", 10, cooldown=0))
+    # The first sample only sets the reference
+    assert fired(engine, 100, now=0) == []
+    assert fired(engine, 109, now=1) == []
+    assert fired(engine, 91, now=2) == []
+    assert fired(engine, 111, now=3) == ["btc"]
+    # The value at the alert becomes the new reference
+    assert fired(engine, 120, now=4) == []
+    assert fired(engine, 99.8, now=5) == ["btc"]
+
+
+def test_only_rules_on_the_target_are_evaluated():
+    engine = make_engine(AlertRule("btc", "price:BTC", "above", 100, cooldown=0),
+                         AlertRule("eth", "price:ETH", "above", 100, cooldown=0))
+    assert fired(engine, 150, now=0, target="price:ETH") == ["eth"]
+    assert fired(engine, 150, now=1) == ["btc"]
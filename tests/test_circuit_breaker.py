@@ -0,0 +1,132 @@
+import pytest
+
+from circuit_breaker import AdaptivePolling, CircuitBreaker, CircuitOpenError
+
+
+def make_breaker(**kwargs):
+    options = {"failure_threshold": 3, "base_backoff": 10, "max_backoff": 35}
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+def trip(breaker, now):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure(now=now)
+
+
+def test_opens_after_consecutive_failures():
+    breaker = make_breaker()
+    breaker.record_failure(now=0)
+    breaker.record_failure(now=0)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow(now=0)
+
+    breaker.record_failure(now=0)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.open_until == 10
+    assert not breaker.allow(now=9)
+
+
+def test_success_resets_the_failure_count():
+    breaker = make_breaker()
+    breaker.record_failure(now=0)
+    breaker.record_failure(now=0)
+    breaker.record_success()
+    breaker.record_failure(now=0)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_rate_limit_opens_straight_away():
+    breaker = make_breaker()
+    breaker.record_failure(rate_limited=True, now=0)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.rate_limited
+
+
+def test_half_open_allows_a_single_trial():
+    breaker = make_breaker()
+    trip(breaker, now=0)
+    assert breaker.allow(now=10)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow(now=10)
+
+
+def test_successful_trial_closes_the_breaker():
+    breaker = make_breaker()
+    trip(breaker, now=0)
+    assert breaker.allow(now=10)
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow(now=10)
+
+    # The backoff starts over from the base after a recovery
+    trip(breaker, now=20)
+    assert breaker.open_until == 30
+
+
+def test_failed_trials_double_the_backoff_up_to_the_cap():
+    breaker = make_breaker()
+    trip(breaker, now=0)
+    assert breaker.open_until == 10
+
+    assert breaker.allow(now=10)
+    breaker.record_failure(now=10)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.open_until == 30
+
+    assert breaker.allow(now=30)
+    breaker.record_failure(now=30)
+    assert breaker.open_until == 30 + 35  # 40 s capped at max_backoff
+
+
+def test_failure_of_a_call_in_flight_does_not_extend_the_backoff():
+    breaker = make_breaker()
+    trip(breaker, now=0)
+    breaker.record_failure(now=5)
+    assert breaker.open_until == 10
+
+
+def test_zero_threshold_disables_the_breaker():
+    breaker = make_breaker(failure_threshold=0)
+    for _ in range(5):
+        breaker.record_failure(rate_limited=True, now=0)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow(now=0)
+
+
+def test_call_raises_while_open():
+    breaker = make_breaker(failure_threshold=1, base_backoff=3600)
+
+    def fail():
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "not called")
+
+
+def test_polling_follows_the_median_move():
+    polling = AdaptivePolling(600, min_factor=0.25, max_factor=4, volatile_pct=2, flat_pct=0.2)
+    values = {f"coin{index}": 100.0 for index in range(10)}
+    assert polling.observe(values) == 600  # Nothing to compare with yet
+
+    # One coin jumping 10% while the rest stay flat is a flat market
+    assert polling.observe(dict(values, coin0=110.0)) == 900
+
+    # Most coins moving 5% is a volatile one
+    assert polling.observe({key: 105.0 for key in values}) == 450
+
+
+def test_polling_stays_within_bounds_and_backs_off_when_rate_limited():
+    polling = AdaptivePolling(600, min_factor=0.25, max_factor=4, volatile_pct=2, flat_pct=0.2)
+    assert polling.observe({}, rate_limited=True) == 1200
+    for _ in range(5):
+        polling.observe({}, rate_limited=True)
+    assert polling.interval() == 2400
+
+    value = 100.0
+    for _ in range(10):
+        value *= 1.05
+        polling.observe({"coin": value})
+    assert polling.interval() == 150
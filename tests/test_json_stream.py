@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from json_stream import iter_json_array
+
+
+def chunked(data, size):
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+def parse(document, size, key="data"):
+    return list(iter_json_array(chunked(json.dumps(document, ensure_ascii=False).encode(), size), key))
+
+
+LISTING = {
+    "status": {"error_code": 0, "notice": None},
+    "data": [
+        {"id": 1, "symbol": "BTC", "name": "Bit\"coin\\", "tags": ["pow", "store-of-value"],
+         "quote": {"USD": {"price": 67123.456789, "percent_change_24h": -1.25e-3}}},
+        {"id": 2, "symbol": "\u00c9TH", "name": "Ether \u2603 \\u escaped", "tags": [], "quote": {"USD": {"price": 3500}}},
+        [1, [2, [3]], {"nested": [4, 5]}],
+        "plain string, with ] and , inside",
+        12345.5,
+        -7,
+        True,
+        None,
+    ],
+}
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 1 << 16])
+def test_matches_json_loads_at_every_chunk_size(size):
+    # Chunk boundaries fall inside strings, escapes, multi-byte characters and numbers
+    assert parse(LISTING, size) == LISTING["data"]
+
+
+@pytest.mark.parametrize("size", [1, 5, 64, 1 << 16])
+def test_batches_of_objects_with_the_separator_inside_them(size):
+    # The "}, {" between two coins also appears inside them; a cut there must not split a coin
+    coins = [{"id": i, "name": "a}, {b" * (i % 3), "platforms": [{"id": i}, {"id": -i}],
+              "quote": {"USD": {"price": i / 7}}} for i in range(200)]
+    assert parse({"data": coins}, size) == coins
+
+    compact = json.dumps({"data": coins}, separators=(",", ":")).encode()
+    assert list(iter_json_array(chunked(compact, size), "data")) == coins
+
+
+def test_whitespace_between_elements():
+    body = b'{"data" :\n [ 1 ,\n\t2 , {"a": [ ] } ,"x" ]\n}'
+    for size in (1, 3, len(body)):
+        assert list(iter_json_array(chunked(body, size), "data")) == [1, 2, {"a": []}, "x"]
+
+
+def test_empty_array():
+    assert list(iter_json_array([b'{"data": []}'], "data")) == []
+    assert list(iter_json_array(chunked(b'{"data": [ ]}', 1), "data")) == []
+
+
+def test_key_split_across_chunks():
+    body = json.dumps({"status": {"padding": "x" * 200}, "data": [1, 2]}).encode()
+    assert list(iter_json_array(chunked(body, 5), "data")) == [1, 2]
+
+
+def test_missing_key():
+    with pytest.raises(ValueError, match="No 'data' array"):
+        list(iter_json_array([b'{"status": {}, "other": [1]}'], "data"))
+
+
+def test_truncated_body():
+    body = json.dumps(LISTING).encode()
+    cut = body[:body.index(b'"id": 2') + 40]  # Inside the second element
+    elements = iter_json_array(chunked(cut, 16), "data")
+    assert next(elements) == LISTING["data"][0]
+    with pytest.raises(ValueError):
+        list(elements)
+
+
+def test_truncated_after_complete_element():
+    with pytest.raises(ValueError, match="Unterminated"):
+        list(iter_json_array([b'{"data": [1, 2,'], "data"))
+
+
+def test_number_at_chunk_end_is_not_cut_short():
+    assert list(iter_json_array([b'{"data": [12', b'34.5', b'e1]}'], "data")) == [12345.0]
+
+
+def test_invalid_element():
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array([b'{"data": [1, {"a": }]}'], "data"))
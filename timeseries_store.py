@@ -0,0 +1,95 @@
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# SQLite file holding the price, dominance and portfolio history of both monitors
+HISTORY_DB = os.getenv("HISTORY_DB", "history.db")
+
+
+class TimeSeriesStore:
+    """Append-only store of (series, timestamp, value) samples in SQLite.
+
+    Series are plain names such as "price:BTC" or "portfolio:Main:value". Samples
+    are indexed by (series, timestamp), so range queries, downsampling and
+    latest-value lookups only touch the rows they need. WAL mode lets the
+    monitors write from separate processes.
+    """
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS samples (series TEXT NOT NULL, ts REAL NOT NULL, value REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS samples_series_ts ON samples (series, ts)")
+
+    def append(self, series, value, ts=None):
+        self.append_many({series: value}, ts)
+
+    def append_many(self, values, ts=None):
+        """Record several series at once, {series: value}; None values are skipped."""
+        ts = time.time() if ts is None else ts
+        rows = [(series, ts, float(value)) for series, value in values.items() if value is not None]
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT INTO samples (series, ts, value) VALUES (?, ?, ?)", rows)
+
+    def range(self, series, start=None, end=None):
+        """All samples of a series between start and end (timestamps, inclusive), as [(ts, value)]."""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT ts, value FROM samples WHERE series = ? AND ts >= ? AND ts <= ? ORDER BY ts",
+                (series, start if start is not None else float("-inf"), end if end is not None else float("inf")),
+            ).fetchall()
+
+    def downsample(self, series, bucket_seconds, start=None, end=None):
+        """Aggregate a series into fixed buckets, as [(bucket_start, avg, min, max, count)]."""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT CAST(ts / ? AS INTEGER) * ? AS bucket, AVG(value), MIN(value), MAX(value), COUNT(*) "
+                "FROM samples WHERE series = ? AND ts >= ? AND ts <= ? GROUP BY bucket ORDER BY bucket",
+                (bucket_seconds, bucket_seconds, series,
+                 start if start is not None else float("-inf"), end if end is not None else float("inf")),
+            ).fetchall()
+
+    def last(self, series):
+        """Most recent value of a series, or None."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM samples WHERE series = ? ORDER BY ts DESC LIMIT 1", (series,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def latest(self, prefix):
+        """Most recent value of every series starting with prefix, as {series: value}."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT series, value FROM samples AS sample WHERE series >= ? AND series < ? "
+                "AND ts = (SELECT MAX(ts) FROM samples WHERE series = sample.series)",
+                (prefix, prefix + "\uffff"),
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def default_store():
+    """The process-wide store at HISTORY_DB, opened on first use."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = TimeSeriesStore(HISTORY_DB)
+        return _default_store